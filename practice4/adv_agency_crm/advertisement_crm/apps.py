@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AdvertisementCrmConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'advertisement_crm'
+
+    def ready(self):
+        from . import signals  # noqa: F401
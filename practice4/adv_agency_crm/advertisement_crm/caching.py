@@ -0,0 +1,49 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+# Усі закешовані відповіді містять у ключі поточну версію даних. Запис у будь-яку модель
+# змінює версію (signals.py), і старі ключі просто перестають читатися, доки їх не витіснить TTL.
+VERSION_KEY = 'crm:data-version'
+
+
+async def adata_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        # Нова версія, а не 1: після витіснення ключа старі записи з версією 1 не мають ожити
+        await cache.aadd(VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+async def aget_or_compute(name, compute):
+    """Low-level cache of compute() under the current data version."""
+    key = f"crm:{name}:{await adata_version()}"
+    value = await cache.aget(key)
+    if value is None:
+        value = await compute()
+        await cache.aset(key, value)
+    return value
+
+
+def cache_json_view(view):
+    """Per-view cache of successful JSON responses of an async view, keyed by path and query string."""
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = f"crm:view:{await adata_version()}:{digest}"
+        content = await cache.aget(key)
+        if content is not None:
+            return HttpResponse(content, content_type='application/json')
+        response = await view(request, *args, **kwargs)
+        if response.status_code == 200:
+            await cache.aset(key, response.content)
+        return response
+    return inner
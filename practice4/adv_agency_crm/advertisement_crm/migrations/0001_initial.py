@@ -0,0 +1,67 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('product_id', models.AutoField(primary_key=True, serialize=False)),
+                ('product_name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+            ],
+            options={
+                'db_table': 'products',
+            },
+        ),
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('user_id', models.AutoField(primary_key=True, serialize=False)),
+                ('username', models.CharField(max_length=255)),
+                ('password', models.CharField(blank=True, max_length=255)),
+                ('email', models.CharField(blank=True, max_length=255)),
+                ('role', models.CharField(blank=True, max_length=50)),
+            ],
+            options={
+                'db_table': 'users',
+            },
+        ),
+        migrations.CreateModel(
+            name='Advertisement',
+            fields=[
+                ('ad_id', models.AutoField(primary_key=True, serialize=False)),
+                ('ad_name', models.CharField(max_length=255)),
+                ('ad_description', models.TextField(blank=True)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('product', models.ForeignKey(blank=True, db_column='product_id', db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='advertisements', to='advertisement_crm.product')),
+            ],
+            options={
+                'db_table': 'advertisements',
+            },
+        ),
+        migrations.CreateModel(
+            name='Sale',
+            fields=[
+                ('sale_id', models.AutoField(primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField(blank=True, null=True)),
+                ('revenue', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('ad', models.ForeignKey(blank=True, db_column='ad_id', db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales', to='advertisement_crm.advertisement')),
+                ('product', models.ForeignKey(blank=True, db_column='product_id', db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales', to='advertisement_crm.product')),
+            ],
+            options={
+                'db_table': 'sales',
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:08
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# LOWER(column) LIKE '%keyword%' of the search; the same indexes as
+# practice4/migrations/0001_search_trigram_indexes.sql, so either can create them
+SEARCH_COLUMNS = [('users', 'username'), ('products', 'product_name'), ('advertisements', 'ad_name')]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_{column}_lower_trgm_idx "
+            f"ON {table} USING gin (LOWER({column}) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in SEARCH_COLUMNS:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {table}_{column}_lower_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('advertisement_crm', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(fields=['start_date', 'end_date'], name='ads_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(fields=['product'], name='ads_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['product'], name='sales_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['ad'], name='sales_ad_idx'),
+        ),
+    ]
@@ -1,3 +1,75 @@
 from django.db import models
 
-# Create your models here.
+# Моделі відображають таблиці, з якими працює Tk-застосунок (practice4/app.py).
+# Пошук іде по LOWER(назва) LIKE '%...%': B-tree такий пошук не прискорює, тому на PostgreSQL
+# міграція 0002 створює тріграмні GIN-індекси (ті ж, що practice4/migrations/0001_search_trigram_indexes.sql).
+# Індекси створює окрема міграція 0002: на базі Tk-застосунку 0001 пропускається
+# (migrate --fake-initial), а індекси мають з'явитися й там. Тому зовнішні ключі без
+# автоматичного db_index — їхні індекси теж явні.
+
+
+class User(models.Model):
+    user_id = models.AutoField(primary_key=True)
+    username = models.CharField(max_length=255)
+    password = models.CharField(max_length=255, blank=True)
+    email = models.CharField(max_length=255, blank=True)
+    role = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        db_table = 'users'
+
+    def __str__(self):
+        return self.username
+
+
+class Product(models.Model):
+    product_id = models.AutoField(primary_key=True)
+    product_name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        db_table = 'products'
+
+    def __str__(self):
+        return self.product_name
+
+
+class Advertisement(models.Model):
+    ad_id = models.AutoField(primary_key=True)
+    ad_name = models.CharField(max_length=255)
+    ad_description = models.TextField(blank=True)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    product = models.ForeignKey(Product, models.SET_NULL, null=True, blank=True,
+                                db_column='product_id', related_name='advertisements', db_index=False)
+
+    class Meta:
+        db_table = 'advertisements'
+        indexes = [
+            models.Index(fields=['start_date', 'end_date'], name='ads_dates_idx'),
+            models.Index(fields=['product'], name='ads_product_idx'),
+        ]
+
+    def __str__(self):
+        return self.ad_name
+
+
+class Sale(models.Model):
+    sale_id = models.AutoField(primary_key=True)
+    product = models.ForeignKey(Product, models.SET_NULL, null=True, blank=True,
+                                db_column='product_id', related_name='sales', db_index=False)
+    quantity = models.IntegerField(null=True, blank=True)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    ad = models.ForeignKey(Advertisement, models.SET_NULL, null=True, blank=True,
+                           db_column='ad_id', related_name='sales', db_index=False)
+
+    class Meta:
+        db_table = 'sales'
+        indexes = [
+            models.Index(fields=['product'], name='sales_product_idx'),
+            models.Index(fields=['ad'], name='sales_ad_idx'),
+        ]
+
+    def __str__(self):
+        return f"Sale {self.sale_id}"
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate
+from .models import Advertisement, Product, Sale, User
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Advertisement)
+@receiver([post_save, post_delete], sender=Sale)
+def invalidate_cached_reads(sender, **kwargs):
+    invalidate()
@@ -1,3 +1,82 @@
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Advertisement, Product, Sale, User
+
+
+class ReadApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        products = Product.objects.bulk_create(
+            Product(product_name=f"Coffee {index}", price=index) for index in range(1, 6)
+        )
+        ads = Advertisement.objects.bulk_create(
+            Advertisement(ad_name=f"Coffee campaign {index}", product=product) for index, product in enumerate(products)
+        )
+        Sale.objects.bulk_create(Sale(product=ad.product, ad=ad, quantity=1, revenue=10) for ad in ads)
+        User.objects.create(username="coffee_admin", email="admin@example.com", role="admin")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_pages_by_key(self):
+        first = self.client.get('/api/products/', {'limit': 2}).json()
+        self.assertEqual([row['product_name'] for row in first['results']], ["Coffee 1", "Coffee 2"])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([row['product_name'] for row in second['results']], ["Coffee 3", "Coffee 4"])
+        last = self.client.get(second['next']).json()
+        self.assertEqual(len(last['results']), 1)
+        self.assertIsNone(last['next'])
+
+    def test_sales_list_has_no_n_plus_one(self):
+        with self.assertNumQueries(1):
+            sales = self.client.get('/api/sales/').json()['results']
+        self.assertEqual(len(sales), 5)
+        self.assertEqual(sales[0]['product']['product_name'], "Coffee 1")
+        self.assertEqual(sales[0]['ad']['ad_name'], "Coffee campaign 0")
+
+    def test_detail(self):
+        ad = Advertisement.objects.first()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/advertisements/{ad.pk}/')
+        self.assertEqual(response.json()['product']['product_name'], "Coffee 1")
+        self.assertEqual(self.client.get('/api/advertisements/0/').status_code, 404)
+        self.assertEqual(self.client.get('/api/unknown/').status_code, 404)
+
+    def test_search(self):
+        with self.assertNumQueries(3):
+            results = self.client.get('/api/search/', {'q': 'COFFEE'}).json()
+        self.assertEqual(len(results['products']), 5)
+        self.assertEqual(len(results['advertisements']), 5)
+        self.assertEqual(results['users'], [
+            {'user_id': 1, 'username': "coffee_admin", 'email': "admin@example.com", 'role': "admin"},
+        ])
+        self.assertEqual(self.client.get('/api/search/', {'q': 'co'}).status_code, 400)
+
+    def test_invalid_paging_parameter(self):
+        self.assertEqual(self.client.get('/api/products/', {'after': 'x'}).status_code, 400)
+
+    def test_sales_summary(self):
+        Sale.objects.create(product=Product.objects.get(product_name="Coffee 3"), quantity=2, revenue=25)
+        summary = self.client.get('/api/sales/summary/', {'limit': 2}).json()
+        self.assertEqual((summary['totals']['sales'], summary['totals']['quantity']), (6, 7))
+        self.assertEqual(Decimal(summary['totals']['revenue']), 75)
+        self.assertEqual([row['product_name'] for row in summary['products']], ["Coffee 3", "Coffee 1"])
+        self.assertEqual(Decimal(summary['products'][0]['revenue']), 35)
+
+    def test_cached_reads_skip_the_database(self):
+        self.client.get('/api/search/', {'q': 'coffee'})
+        self.client.get('/api/sales/summary/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/search/', {'q': 'coffee'})
+            self.client.get('/api/sales/summary/', {'limit': 1})
+
+    def test_writes_invalidate_cached_reads(self):
+        self.assertEqual(len(self.client.get('/api/search/', {'q': 'coffee'}).json()['products']), 5)
+        summary = self.client.get('/api/sales/summary/').json()
+        Product.objects.create(product_name="Coffee beans", price=7)
+        Sale.objects.create(product=Product.objects.first(), quantity=1, revenue=1)
+        self.assertEqual(len(self.client.get('/api/search/', {'q': 'coffee'}).json()['products']), 6)
+        self.assertEqual(self.client.get('/api/sales/summary/').json()['totals']['sales'], summary['totals']['sales'] + 1)
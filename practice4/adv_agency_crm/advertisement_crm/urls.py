@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('search/', views.search, name='search'),
+    path('sales/summary/', views.sales_summary, name='sales-summary'),
+    path('<str:resource>/', views.resource_list, name='resource-list'),
+    path('<str:resource>/<int:pk>/', views.resource_detail, name='resource-detail'),
+]
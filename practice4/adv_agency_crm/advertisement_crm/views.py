@@ -1,3 +1,159 @@
-from django.shortcuts import render
+from django.core.exceptions import BadRequest
+from django.db.models import Count, Sum
+from django.db.models.functions import Lower
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from .caching import aget_or_compute, cache_json_view
+from .models import Advertisement, Product, Sale, User
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+SEARCH_LIMIT = 20
+SEARCH_MIN_CHARS = 3
+SUMMARY_LIMIT = 50
+SEARCH_COLUMNS = {'users': 'username', 'products': 'product_name', 'advertisements': 'ad_name'}
+
+
+def serialize_user(user):
+    return {'user_id': user.user_id, 'username': user.username, 'email': user.email, 'role': user.role}
+
+
+def serialize_product(product):
+    return {
+        'product_id': product.product_id,
+        'product_name': product.product_name,
+        'description': product.description,
+        'price': str(product.price),
+    }
+
+
+def serialize_advertisement(ad):
+    return {
+        'ad_id': ad.ad_id,
+        'ad_name': ad.ad_name,
+        'ad_description': ad.ad_description,
+        'start_date': ad.start_date,
+        'end_date': ad.end_date,
+        'product': ad.product and {'product_id': ad.product.product_id, 'product_name': ad.product.product_name},
+    }
+
+
+def serialize_sale(sale):
+    return {
+        'sale_id': sale.sale_id,
+        'quantity': sale.quantity,
+        'revenue': None if sale.revenue is None else str(sale.revenue),
+        'product': sale.product and {'product_id': sale.product.product_id, 'product_name': sale.product.product_name},
+        'ad': sale.ad and {'ad_id': sale.ad.ad_id, 'ad_name': sale.ad.ad_name},
+    }
+
+
+# Для кожного ресурсу: queryset лише з потрібними колонками (JOIN замість N+1) і серіалізатор
+RESOURCES = {
+    'users': (
+        lambda: User.objects.only('user_id', 'username', 'email', 'role'),
+        serialize_user,
+    ),
+    'products': (
+        lambda: Product.objects.all(),
+        serialize_product,
+    ),
+    'advertisements': (
+        lambda: Advertisement.objects.select_related('product').only(
+            'ad_id', 'ad_name', 'ad_description', 'start_date', 'end_date',
+            'product__product_id', 'product__product_name',
+        ),
+        serialize_advertisement,
+    ),
+    'sales': (
+        lambda: Sale.objects.select_related('product', 'ad').only(
+            'sale_id', 'quantity', 'revenue',
+            'product__product_id', 'product__product_name', 'ad__ad_id', 'ad__ad_name',
+        ),
+        serialize_sale,
+    ),
+}
+
+
+def int_param(request, name, default, maximum=None):
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    return max(0, value if maximum is None else min(value, maximum))
+
+
+@require_GET
+def resource_list(request, resource):
+    """Keyset-paginated list: ?after=<last id of the previous page>&limit=<rows>."""
+    if resource not in RESOURCES:
+        raise Http404(resource)
+    queryset, serialize = RESOURCES[resource]
+    after = int_param(request, 'after', 0)
+    limit = int_param(request, 'limit', PAGE_SIZE, MAX_PAGE_SIZE) or PAGE_SIZE
+    # limit + 1 рядок показує, чи є наступна сторінка, без COUNT(*) і OFFSET
+    rows = list(queryset().filter(pk__gt=after).order_by('pk')[:limit + 1])
+    page, more = rows[:limit], len(rows) > limit
+    return JsonResponse({
+        'results': [serialize(row) for row in page],
+        'next': f"{request.path}?after={page[-1].pk}&limit={limit}" if more else None,
+    })
+
+
+@require_GET
+def resource_detail(request, resource, pk):
+    if resource not in RESOURCES:
+        raise Http404(resource)
+    queryset, serialize = RESOURCES[resource]
+    try:
+        row = queryset().get(pk=pk)
+    except queryset().model.DoesNotExist:
+        raise Http404(f"{resource} {pk} not found")
+    return JsonResponse(serialize(row))
+
+
+async def search_results(keyword):
+    """Same matching as the Tk app search: LOWER(name) LIKE '%keyword%', served by the trigram indexes."""
+    keyword = keyword.lower()
+    results = {}
+    for resource, column in SEARCH_COLUMNS.items():
+        queryset, serialize = RESOURCES[resource]
+        matches = queryset().alias(name_lower=Lower(column)).filter(name_lower__contains=keyword).order_by('pk')
+        results[resource] = [serialize(row) async for row in matches[:SEARCH_LIMIT]]
+    return results
+
+
+@require_GET
+@cache_json_view
+async def search(request):
+    keyword = request.GET.get('q', '').strip()
+    if len(keyword) < SEARCH_MIN_CHARS:
+        return JsonResponse({'error': f"q must be at least {SEARCH_MIN_CHARS} characters"}, status=400)
+    return JsonResponse(await search_results(keyword))
+
+
+async def sales_summary_data():
+    """Sales totals and the SUMMARY_LIMIT products with the highest revenue, aggregated in the database."""
+    totals = await Sale.objects.aaggregate(sales=Count('pk'), quantity=Sum('quantity'), revenue=Sum('revenue'))
+    products = (
+        Sale.objects.values('product_id', 'product__product_name')
+        .annotate(sales=Count('pk'), quantity=Sum('quantity'), revenue=Sum('revenue'))
+        .order_by('-revenue', 'product_id')[:SUMMARY_LIMIT]
+    )
+    return {
+        'totals': totals,
+        'products': [
+            {'product_id': row['product_id'], 'product_name': row['product__product_name'],
+             'sales': row['sales'], 'quantity': row['quantity'], 'revenue': row['revenue']}
+            async for row in products
+        ],
+    }
+
+
+@require_GET
+async def sales_summary(request):
+    """?limit=<products>; the aggregate itself is cached once for every limit."""
+    limit = int_param(request, 'limit', SUMMARY_LIMIT, SUMMARY_LIMIT)
+    summary = await aget_or_compute('sales-summary', sales_summary_data)
+    return JsonResponse({'totals': summary['totals'], 'products': summary['products'][:limit]})
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'advertisement_crm',
 ]
 
 MIDDLEWARE = [
@@ -73,10 +75,50 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
+# The same PostgreSQL database as the Tk app (practice4/crm_db.py); CRM_DB_ENGINE=sqlite
+# switches to the local db.sqlite3 for development. On a database the Tk app already
+# created, run `manage.py migrate --fake-initial` so the existing tables are kept; only
+# 0001 is faked, and 0002 still adds the indexes to those tables.
+
+if os.environ.get('CRM_DB_ENGINE', 'postgresql') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('CRM_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'HOST': os.environ.get('CRM_DB_HOST', 'localhost'),
+            'NAME': os.environ.get('CRM_DB_NAME', 'advertisement_agency'),
+            'USER': os.environ.get('CRM_DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('CRM_DB_PASSWORD', 'root'),
+            'CONN_MAX_AGE': 60,
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# CRM_CACHE_BACKEND: locmem (per process), file (shared by all workers on one host) or dummy
+# (no caching, e.g. for load-test baselines). Model writes invalidate cached reads through
+# advertisement_crm/signals.py; writes made outside the ORM (the Tk app, bulk_create,
+# queryset.update) only show up after CRM_CACHE_TIMEOUT seconds.
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'adv-agency-crm'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', BASE_DIR / 'cache'),
+    'dummy': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+CACHE_BACKEND, CACHE_LOCATION = CACHE_BACKENDS[os.environ.get('CRM_CACHE_BACKEND', 'locmem')]
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CRM_CACHE_LOCATION', CACHE_LOCATION),
+        'TIMEOUT': int(os.environ.get('CRM_CACHE_TIMEOUT', 60)),
     }
 }
 
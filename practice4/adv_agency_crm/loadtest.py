@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Load test of the CRM read API: requests/sec and latency percentiles, with and without the cache.
+
+    python loadtest.py                               # in-process ASGI app, configured cache vs no cache
+    python loadtest.py --url http://127.0.0.1:8000   # a running server, e.g. uvicorn config.asgi:application
+
+The in-process run uses the database from the CRM_DB_* settings, so point it at a populated one.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/api/search/?q=cof", "/api/sales/summary/"]
+
+
+def percentile(latencies, fraction):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+async def run_load(client, paths, requests, concurrency):
+    """Send `requests` GETs cycling through paths from `concurrency` workers; return (seconds, latencies, errors)."""
+    latencies = []
+    errors = 0
+    issued = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in issued:
+            started = time.perf_counter()
+            response = await client.get(paths[index % len(paths)])
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    for path in paths:  # прогрів: заповнює кеш і пул з'єднань
+        await client.get(path)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, sorted(latencies), errors
+
+
+def report(label, elapsed, latencies, errors):
+    print(f"{label:<12} {len(latencies) / elapsed:10,.0f} req/s  p50 {percentile(latencies, 0.5) * 1000:7.2f} ms"
+          f"  p99 {percentile(latencies, 0.99) * 1000:7.2f} ms  errors {errors}")
+
+
+async def load_url(args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+        report(args.url, *await run_load(client, args.paths, args.requests, args.concurrency))
+
+
+async def load_in_process(args):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    from config.asgi import application
+
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        label = os.environ.get('CRM_CACHE_BACKEND', 'locmem')
+        report(label, *await run_load(client, args.paths, args.requests, args.concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure requests/sec and p99 latency of the CRM read API.")
+    parser.add_argument("--url", help="base URL of a running server; default is the in-process ASGI app")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--path", dest="paths", action="append", help="endpoint to hit, repeatable")
+    parser.add_argument("--in-process", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.paths = args.paths or DEFAULT_PATHS
+
+    if args.url:
+        asyncio.run(load_url(args))
+    elif args.in_process:
+        asyncio.run(load_in_process(args))
+    else:
+        # Кеш налаштовується при старті Django, тому кожен варіант у власному процесі
+        command = [sys.executable, os.path.abspath(__file__), "--in-process",
+                   "--requests", str(args.requests), "--concurrency", str(args.concurrency)]
+        for path in args.paths:
+            command += ["--path", path]
+        for backend in (os.environ.get('CRM_CACHE_BACKEND', 'locmem'), 'dummy'):
+            subprocess.run(command, env={**os.environ, 'CRM_CACHE_BACKEND': backend}, check=True)
+
+
+if __name__ == "__main__":
+    main()
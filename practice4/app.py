@@ -1,9 +1,87 @@
+import sys
 import tkinter as tk
-from tkinter import messagebox
-import psycopg2
+from collections import OrderedDict
+from tkinter import filedialog, messagebox
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from crm_db import Database
+from sales_snapshot import NEW_SALES_QUERY, SalesSnapshot
+
+SEARCH_SECTIONS = ("Users", "Products", "Advertisements")
+SEARCH_PAGE_SIZE = 100
+# Скільки сторінок результатів тримати в пам'яті; решта довантажується при прокрутці
+SEARCH_CACHED_PAGES = 5
+# Пошук під час введення: пауза після останньої клавіші (мс) і мінімальна довжина запиту,
+# з якої тріграмні індекси ще вибіркові
+SEARCH_DEBOUNCE_MS = 300
+SEARCH_MIN_CHARS = 3
+
+# Один запит замість трьох: лише колонки для списку, keyset-пагінація по (section_order, id).
+# LOWER(column) LIKE збігається з тріграмними GIN-індексами з migrations/0001_search_trigram_indexes.sql
+SEARCH_QUERY = """
+SELECT section_order, id, name, extra FROM (
+    SELECT 0 AS section_order, user_id AS id, username AS name, email AS extra
+    FROM users WHERE LOWER(username) LIKE %s ESCAPE '\\'
+    UNION ALL
+    SELECT 1, product_id, product_name, CAST(price AS TEXT)
+    FROM products WHERE LOWER(product_name) LIKE %s ESCAPE '\\'
+    UNION ALL
+    SELECT 2, ad_id, ad_name, NULL
+    FROM advertisements WHERE LOWER(ad_name) LIKE %s ESCAPE '\\'
+) AS results
+WHERE (section_order, id) > (%s, %s)
+ORDER BY section_order, id
+LIMIT %s
+"""
+
+DETAIL_QUERIES = {
+    "Users": "SELECT * FROM users WHERE user_id = %s",
+    "Products": "SELECT * FROM products WHERE product_id = %s",
+    "Advertisements": "SELECT * FROM advertisements WHERE ad_id = %s",
+}
+
+
+# Графіки: агрегація і top-N рахуються в БД, у програму приходить не більше кількох сотень рядків
+PRODUCT_CHART_LIMIT = 30
+SALES_CHART_BUCKETS = 200
+
+PRODUCTS_CHART_QUERY = """
+SELECT product_name, price FROM products
+ORDER BY price DESC, product_id
+LIMIT %s
+"""
+
+# UPDATE для кожного розділу та ключі словника в порядку параметрів
+UPDATE_QUERIES = {
+    "Users": ("""
+        UPDATE users
+        SET username = %s,
+            email = %s,
+            role = %s
+        WHERE user_id = %s;
+        """, ("username", "email", "role", "user_id")),
+    "Products": ("""
+        UPDATE products
+        SET product_name = %s,
+            description = %s,
+            price = %s
+        WHERE product_id = %s;
+        """, ("product_name", "description", "price", "product_id")),
+    "Advertisements": ("""
+        UPDATE advertisements
+        SET ad_name = %s,
+            ad_description = %s
+        WHERE ad_id = %s;
+        """, ("ad_name", "ad_description", "ad_id")),
+}
+
+
+def like_pattern(keyword):
+    """'%keyword%' with LIKE wildcards in the keyword matched literally."""
+    escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
 
 class DetailView:
     def __init__(self, master, item):
@@ -15,24 +93,163 @@ class DetailView:
         detail_label = tk.Label(self.master, text=f"Selected Item Details:\n{self.item}")
         detail_label.pack()
 
+class VirtualListView:
+    """Listbox that only holds the visible rows of a large, paged result set.
+
+    Rows are (key, text, payload) records fetched in pages of page_size through
+    fetch_page(page, after_key, callback, errback), where after_key is the key of the last
+    row of the previous page. At most max_pages pages are kept; evicted pages are fetched
+    again when scrolled back to. A row index maps to its record in O(1), so a double-click
+    calls on_open(payload) for exactly the clicked row.
+    """
+
+    def __init__(self, master, height, width, page_size, max_pages, fetch_page, on_open):
+        self.height = height
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.fetch_page = fetch_page
+        self.on_open = on_open
+        self.listbox = tk.Listbox(master, height=height, width=width)
+        self.scrollbar = tk.Scrollbar(master, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.listbox.bind("<Double-Button-1>", self.on_double_click)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll_by(-1 if event.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_by(-1))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_by(1))
+        self.show_message("")
+
+    def reset(self):
+        """Forget the current rows and start loading from the first page."""
+        self.generation = getattr(self, 'generation', 0) + 1
+        self.pages = OrderedDict()
+        self.page_keys = [None]  # after_key of every page reached so far
+        self.loading = set()
+        self.row_count = 0
+        self.complete = False
+        self.message = None
+        self.top = 0
+        self.request_page(0)
+
+    def show_message(self, text):
+        self.generation = getattr(self, 'generation', 0) + 1
+        self.pages = OrderedDict()
+        self.page_keys = [None]
+        self.loading = set()
+        self.row_count = 0
+        self.complete = True
+        self.message = text
+        self.top = 0
+        self.render()
+
+    def request_page(self, page):
+        if page in self.pages or page in self.loading or page >= len(self.page_keys):
+            return
+        self.loading.add(page)
+        generation = self.generation
+        self.fetch_page(page, self.page_keys[page],
+                        lambda records: self.page_loaded(page, records, generation),
+                        lambda error: self.page_failed(page, generation))
+
+    def page_loaded(self, page, records, generation):
+        if generation != self.generation:
+            return  # відповідь для попереднього списку
+        self.loading.discard(page)
+        self.pages[page] = records
+        self.pages.move_to_end(page)
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        if page == len(self.page_keys) - 1:
+            if len(records) < self.page_size:
+                self.complete = True
+            else:
+                self.page_keys.append(records[-1][0])
+            self.row_count = page * self.page_size + len(records)
+            if not self.row_count and self.complete:
+                self.message = "No matching data found."
+        self.render()
+
+    def page_failed(self, page, generation):
+        """Forget a failed page request; False when it belonged to a replaced list."""
+        if generation != self.generation:
+            return False
+        self.loading.discard(page)
+        return True
+
+    def record(self, index):
+        page = self.pages.get(index // self.page_size)
+        if page is None or index % self.page_size >= len(page):
+            return None
+        return page[index % self.page_size]
+
+    def render(self):
+        self.listbox.delete(0, tk.END)
+        if self.message is not None:
+            self.listbox.insert(tk.END, self.message)
+            self.scrollbar.set(0, 1)
+            return
+        for index in range(self.top, min(self.top + self.height, self.row_count)):
+            record = self.record(index)
+            if record is None:
+                self.request_page(index // self.page_size)
+            self.listbox.insert(tk.END, "Loading..." if record is None else record[1])
+        # Наступна сторінка, коли користувач догортав до кінця завантажених рядків
+        if not self.complete and self.top + 2 * self.height >= self.row_count:
+            self.request_page(len(self.page_keys) - 1)
+        if self.row_count:
+            self.scrollbar.set(self.top / self.row_count, min(1, (self.top + self.height) / self.row_count))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, self.row_count - self.height))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.top + rows)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.row_count))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.height)
+        else:
+            self.scroll_by(int(amount))
+
+    def on_double_click(self, event):
+        if self.message is not None:
+            return
+        record = self.record(self.top + self.listbox.nearest(event.y))
+        if record is not None:
+            self.on_open(record[2])
+
+
 class Application(tk.Tk):
-    def __init__(self):
+    def __init__(self, sqlite_path=None):
         super().__init__()
         self.title("Data Management Application")
         self.geometry("500x500")
         self.full_data = {}
         self.displayed_data = {}
+        self.search_keyword = ""
+        self.search_future = None
+        self.search_after_id = None
         
-        # Підключення до бази даних PostgreSQL
-        self.conn = psycopg2.connect(
-            host="localhost",
-            database="advertisement_agency",
-            user="postgres",
-            password="root",
-        )
-        self.cur = self.conn.cursor()
+        # Пул підключень до бази даних PostgreSQL (або SQLite замість неї) з фоновими потоками
+        self.db = Database(self, sqlite_path=sqlite_path)
+        self.sales_snapshot = SalesSnapshot(self.db.source)
+        self.sales_refresh = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
         self.create_widgets()
+
+    def on_close(self):
+        self.db.close()
+        self.sales_snapshot.close()
+        self.destroy()
+
+    def show_db_error(self, error):
+        messagebox.showerror("Error", f"Database error: {error}")
     
     def create_widgets(self):
         # Форма для додавання даних
@@ -59,18 +276,21 @@ class Application(tk.Tk):
         self.lbl_search.grid(row=4, column=0, sticky="w")
         self.entry_search = tk.Entry(self)
         self.entry_search.grid(row=4, column=1)
+        self.entry_search.bind("<KeyRelease>", self.on_search_key)
         
         self.btn_search = tk.Button(self, text="Search", command=self.search_data)
         self.btn_search.grid(row=5, columnspan=2, pady=5)
         
-        scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL)
-        scrollbar.grid(row=6, column=2, sticky=tk.NS)
-
-        self.display_area = tk.Listbox(self, height=10, width=40, yscrollcommand=scrollbar.set)
+        self.results_view = VirtualListView(self, height=10, width=40, page_size=SEARCH_PAGE_SIZE,
+                                            max_pages=SEARCH_CACHED_PAGES, fetch_page=self.fetch_search_page,
+                                            on_open=self.open_selected_item)
+        self.results_view.scrollbar.grid(row=6, column=2, sticky=tk.NS)
+        self.display_area = self.results_view.listbox
         self.display_area.grid(row=6, columnspan=2)
-        scrollbar.config(command=self.display_area.yview)
 
-        self.display_area.bind("<Double-Button-1>", self.open_detail_window)
+        # Кнопка для імпорту каталогу продуктів з CSV/Excel
+        self.btn_import = tk.Button(self, text="Import Products", command=self.import_products)
+        self.btn_import.grid(row=7, column=1, pady=5)
 
         # Кнопка для візуалізації даних продуктів
         self.btn_visualize_products = tk.Button(self, text="Visualize Products Data", command=self.visualize_products_data)
@@ -81,92 +301,125 @@ class Application(tk.Tk):
         self.btn_visualize_sales.grid(row=8, column=0, pady=5)
     
     def add_data(self):
-        self.display_area.delete(0, tk.END)
+        self.results_view.show_message("")
         product_name = self.entry_product_name.get()
         description = self.entry_description.get()
         price = self.entry_price.get()
         
         if product_name and price:
-            try:
-                self.cur.execute("INSERT INTO products (product_name, description, price) VALUES (%s, %s, %s)", (product_name, description, price))
-                self.conn.commit()
-                self.display_data("Data added successfully!", "Products")
-            except psycopg2.Error as e:
-                messagebox.showerror("Error", f"Error adding data: {e}")
+            self.db.execute(
+                "INSERT INTO products (product_name, description, price) VALUES (%s, %s, %s)",
+                (product_name, description, price),
+                callback=lambda _: self.results_view.show_message("Data added successfully!"),
+                errback=lambda e: messagebox.showerror("Error", f"Error adding data: {e}"),
+            )
         else:
             messagebox.showerror("Error", "Please fill in all fields.")
 
+    def import_products(self):
+        path = filedialog.askopenfilename(
+            title="Import products",
+            filetypes=[("Product catalogue", "*.csv *.xlsx *.xlsm"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        self.btn_import.config(state=tk.DISABLED)
+        self.results_view.show_message("Importing products...")
+
+        def progress(imported):
+            self.results_view.show_message(f"Imported {imported:,} products...")
+
+        def done(imported):
+            self.btn_import.config(state=tk.NORMAL)
+            self.results_view.show_message(f"Imported {imported:,} products.")
+
+        def failed(error):
+            self.btn_import.config(state=tk.NORMAL)
+            messagebox.showerror("Error", f"Error importing products: {error}")
+
+        self.db.import_products(path, progress=progress, callback=done, errback=failed)
+
+    def on_search_key(self, event):
+        # Debounce: шукаємо лише коли користувач перестав друкувати
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        keyword = self.entry_search.get().strip()
+        if len(keyword) >= SEARCH_MIN_CHARS and keyword.lower() != self.search_keyword:
+            self.search_after_id = self.after(SEARCH_DEBOUNCE_MS, self.search_data)
+
     def search_data(self):
-        print(self.display_area)
-        self.display_area.delete(0, tk.END)
-        keyword = self.entry_search.get().lower()
-        
-        # Пошук в таблиці користувачів
-        self.cur.execute("SELECT * FROM users WHERE LOWER(username) LIKE %s", ('%' + keyword + '%',))
-        user_results = self.cur.fetchall()
-        self.display_data(user_results, "Users")
-        
-        # Пошук в таблиці продуктів
-        self.cur.execute("SELECT * FROM products WHERE LOWER(product_name) LIKE %s", ('%' + keyword + '%',))
-        product_results = self.cur.fetchall()
-        self.display_data(product_results, "Products")
-        
-        # Пошук в таблиці реклам
-        self.cur.execute("SELECT * FROM advertisements WHERE LOWER(ad_name) LIKE %s", ('%' + keyword + '%',))
-        ad_results = self.cur.fetchall()
-        self.display_data(ad_results, "Advertisements")
-
-        self.display_area.update_idletasks()
-
-    def display_data(self, data, section):
-        if data:
-            self.display_area.insert(tk.END, f"{section}:")
-            
-            for item in data:
-                text = ""
-                if section == "Users":
-                    text = f"{item[1]} ({item[3]})"
-                elif section == "Products":
-                    text = f"{item[1]}, {float(item[3])}"
-                elif section == "Advertisements":
-                    text = f"{item[1]}"
-                self.display_area.insert(tk.END, text)
-                self.display_area.bind("<Double-Button-1>", lambda event, x=item, y=section: self.open_detail_window(x, y))
+        self.search_after_id = None
+        if self.search_future is not None:
+            self.db.cancel(self.search_future)  # застарілий запит більше не потрібен
+            self.search_future = None
+        self.search_keyword = self.entry_search.get().strip().lower()
+        self.results_view.reset()
+
+    def fetch_search_page(self, page, after_key, callback, errback):
+        pattern = like_pattern(self.search_keyword)
+        params = (pattern, pattern, pattern) + (after_key or (-1, -1)) + (SEARCH_PAGE_SIZE,)
+
+        def finished():
+            # Новіший пошук уже міг замінити цей запит - тоді його future не чіпаємо
+            if self.search_future is future:
+                self.search_future = None
+
+        def loaded(rows):
+            finished()
+            callback([self.search_record(row) for row in rows])
+
+        def failed(error):
+            finished()
+            if errback(error):
+                self.show_db_error(error)
+
+        future = self.search_future = self.db.fetchall(SEARCH_QUERY, params, callback=loaded, errback=failed)
+
+    @staticmethod
+    def search_record(row):
+        """(key, text, payload) record of the results view for a SEARCH_QUERY row."""
+        section_order, record_id, name, extra = row
+        section = SEARCH_SECTIONS[section_order]
+        if section == "Users":
+            text = f"{name} ({extra})"
+        elif section == "Products":
+            text = f"{name}, {float(extra)}"
         else:
-            self.display_area.insert(tk.END, f"No matching data found in {section}.")
-        self.display_area.see(tk.END)
-        
+            text = f"{name}"
+        return (section_order, record_id), f"[{section}] {text}", (section, record_id)
+
+    def open_selected_item(self, record):
+        section, record_id = record
+        self.db.fetchall(
+            DETAIL_QUERIES[section], (record_id,),
+            callback=lambda rows: rows and self.open_detail_window(rows[0], section),
+            errback=self.show_db_error,
+        )
+
+    def update_records(self, section, items, callback=None):
+        """Apply many edits of one section as a single batched UPDATE in one transaction."""
+        sql, keys = UPDATE_QUERIES[section]
+        params = [tuple(item[key] for key in keys) for item in items]
+        self.db.executemany(sql, params, callback=callback, errback=self.show_db_error)
+
     def update_user(self, user_data):
-        sql = """
-        UPDATE users
-        SET username = %s,
-            email = %s,
-            role = %s
-        WHERE user_id = %s;
-        """
-        self.cur.execute(sql, (user_data['username'], user_data['email'], user_data['role'], user_data['user_id']))
-        self.conn.commit()
+        self.update_records("Users", [user_data])
+
+    def update_users(self, users):
+        self.update_records("Users", users)
 
     def update_product(self, product_data):
-        sql = """
-        UPDATE products
-        SET product_name = %s,
-            description = %s,
-            price = %s
-        WHERE product_id = %s;
-        """
-        self.cur.execute(sql, (product_data['product_name'], product_data['description'], product_data['price'], product_data['product_id']))
-        self.conn.commit()
+        self.update_records("Products", [product_data])
+
+    def update_products(self, products):
+        self.update_records("Products", products)
 
     def update_advertisement(self, ad_data):
-        sql = """
-        UPDATE advertisements
-        SET ad_name = %s,
-            ad_description = %s
-        WHERE ad_id = %s;
-        """
-        self.cur.execute(sql, (ad_data['ad_name'], ad_data['ad_description'], ad_data['ad_id']))
-        self.conn.commit()
+        self.update_records("Advertisements", [ad_data])
+
+    def update_advertisements(self, ads):
+        self.update_records("Advertisements", ads)
 
     def update_item(self, dict_item, section):
         dict_item = {key: entry.get() for key, entry in dict_item.items()}
@@ -219,29 +472,58 @@ class Application(tk.Tk):
         update_button.pack(pady=10)
 
     def visualize_products_data(self):
-        self.cur.execute("SELECT * FROM products")
-        data = self.cur.fetchall()
-        df = pd.DataFrame(data, columns=['Product ID', 'Product Name', 'Description', 'Price'])
-        
+        self.db.fetchall(PRODUCTS_CHART_QUERY, (PRODUCT_CHART_LIMIT,),
+                         callback=self.plot_products_data, errback=self.show_db_error)
+
+    def plot_products_data(self, data):
+        df = pd.DataFrame(data, columns=['Product Name', 'Price']).astype({'Price': float})
+
         plt.bar(df['Product Name'], df['Price'])
         plt.xlabel('Product Name')
         plt.ylabel('Price')
-        plt.title('Product Prices')
+        plt.title(f'Product Prices (top {PRODUCT_CHART_LIMIT})')
         plt.xticks(rotation=45, ha='right')
         plt.show()
 
     def visualize_sales_data(self):
-        self.cur.execute("SELECT * FROM sales")
-        data = self.cur.fetchall()
-        df = pd.DataFrame(data, columns=['Sale ID', 'Product ID', 'Quantity', 'Revenue', 'Advertisement ID'])
-        
-        plt.bar(df['Sale ID'], df['Revenue'])
+        # Дочитуємо лише останні блоки знімка; паралельне оновлення лише повторило б ту саму роботу
+        if self.sales_refresh is not None:
+            return
+        block_size, first_sale_id = self.sales_snapshot.refresh_params()
+        self.sales_refresh = self.db.fetch_streamed(
+            NEW_SALES_QUERY, (block_size, first_sale_id),
+            consume=lambda rows: self.sales_snapshot.merge(rows, first_sale_id),
+            callback=lambda added: self.sales_refreshed(), errback=self.sales_refresh_failed,
+        )
+
+    def sales_refreshed(self):
+        self.sales_refresh = None
+        self.plot_sales_data()
+
+    def sales_refresh_failed(self, error):
+        self.sales_refresh = None
+        if self.sales_snapshot.state()[1] is None:
+            self.show_db_error(error)
+        else:
+            self.plot_sales_data(stale=True)
+
+    def plot_sales_data(self, stale=False):
+        df = self.sales_snapshot.frame(SALES_CHART_BUCKETS)
+        last_sale_id, refreshed_at = self.sales_snapshot.state()
+        freshness = f"up to sale #{last_sale_id}"
+        if refreshed_at is not None:
+            freshness += f", as of {refreshed_at:%Y-%m-%d %H:%M:%S}"
+        if stale:
+            freshness += ", database unavailable"
+
+        plt.bar(df['First Sale ID'], df['Revenue'], width=df['Last Sale ID'] - df['First Sale ID'] + 1, align='edge')
         plt.xlabel('Sale ID')
         plt.ylabel('Revenue')
-        plt.title('Sales Revenue')
+        plt.title(f'Sales Revenue ({df["Sales"].sum():,} sales, {freshness})')
         plt.show()
 
 
 if __name__ == "__main__":
-    app = Application()
+    # python app.py [sqlite_file] - без аргументу підключається до PostgreSQL
+    app = Application(sqlite_path=sys.argv[1] if len(sys.argv) > 1 else None)
     app.mainloop()
@@ -0,0 +1,358 @@
+import csv
+import itertools
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import psycopg2
+import psycopg2.extras
+import psycopg2.pool
+
+POSTGRES_PARAMS = {
+    'host': "localhost",
+    'database': "advertisement_agency",
+    'user': "postgres",
+    'password': "root",
+}
+
+IMPORT_BATCH_SIZE = 5000
+# Рядків за один запит до серверного курсора
+STREAM_ITERSIZE = 2000
+PRODUCT_IMPORT_COLUMNS = ("product_name", "description", "price")
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Tables the application expects, for a local SQLite stand-in of the PostgreSQL database
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    password TEXT,
+    email TEXT,
+    role TEXT
+);
+CREATE TABLE IF NOT EXISTS products (
+    product_id INTEGER PRIMARY KEY,
+    product_name TEXT NOT NULL,
+    description TEXT,
+    price NUMERIC NOT NULL
+);
+CREATE TABLE IF NOT EXISTS advertisements (
+    ad_id INTEGER PRIMARY KEY,
+    ad_name TEXT NOT NULL,
+    ad_description TEXT,
+    start_date DATE,
+    end_date DATE,
+    product_id INTEGER REFERENCES products (product_id)
+);
+CREATE TABLE IF NOT EXISTS sales (
+    sale_id INTEGER PRIMARY KEY,
+    product_id INTEGER REFERENCES products (product_id),
+    quantity INTEGER,
+    revenue NUMERIC,
+    ad_id INTEGER REFERENCES advertisements (ad_id)
+);
+"""
+
+
+def iter_table_rows(path):
+    """Stream the rows of a .csv or .xlsx file as dicts keyed by the lower-cased header row."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        import openpyxl  # лише для імпорту з Excel
+
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(name or "").strip().lower() for name in next(rows, ())]
+            for row in rows:
+                yield dict(zip(header, row))
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            reader = csv.reader(file)
+            header = [name.strip().lower() for name in next(reader, ())]
+            for row in reader:
+                yield dict(zip(header, row))
+
+
+def iter_product_rows(path):
+    """(product_name, description, price) tuples of a product catalogue file."""
+    for line, row in enumerate(iter_table_rows(path), start=2):
+        if not any(value not in (None, "") for value in row.values()):
+            continue  # порожній рядок
+        product_name, description, price = (row.get(column) for column in PRODUCT_IMPORT_COLUMNS)
+        if product_name in (None, "") or price in (None, ""):
+            raise ValueError(f"Row {line}: product_name and price are required")
+        yield str(product_name), "" if description is None else str(description), price
+
+
+def iter_batches(rows, batch_size):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, batch_size)):
+        yield batch
+
+
+class SQLitePool:
+    """Minimal ThreadedConnectionPool look-alike handing out SQLite connections to worker threads."""
+
+    def __init__(self, minconn, maxconn, path):
+        self.path = path
+        self.maxconn = maxconn
+        self.idle = queue.LifoQueue()
+        self.created = minconn
+        self.lock = threading.Lock()
+        for _ in range(minconn):
+            self.idle.put(self.connect())
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.executescript(SQLITE_SCHEMA)
+        return conn
+
+    def getconn(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        # Перевірка й резервування під одним замком, інакше потоки разом перевищать maxconn
+        with self.lock:
+            reserved = self.created < self.maxconn
+            if reserved:
+                self.created += 1
+        if not reserved:
+            return self.idle.get()
+        try:
+            return self.connect()
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+
+    def putconn(self, conn):
+        self.idle.put(conn)
+
+    def closeall(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+
+class Database:
+    """Pooled connections used from a worker thread pool.
+
+    Jobs run off the Tk main thread with their own pooled connection and cursor, and their
+    results (or errors) are handed back to Tk callbacks from an after() poll, so the UI never
+    waits on a query and widgets are only touched from the main thread.
+    """
+
+    def __init__(self, root, sqlite_path=None, minconn=1, maxconn=4, poll_interval=50):
+        self.root = root
+        self.poll_interval = poll_interval
+        if sqlite_path:
+            self.pool = SQLitePool(minconn, maxconn, sqlite_path)
+            self.Error = sqlite3.Error
+            self.placeholder = "?"
+            self.source = f"sqlite:{os.path.abspath(sqlite_path)}"
+        else:
+            self.pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, **POSTGRES_PARAMS)
+            self.Error = psycopg2.Error
+            self.placeholder = "%s"
+            self.source = "postgresql://{user}@{host}/{database}".format(**POSTGRES_PARAMS)
+        self.executor = ThreadPoolExecutor(max_workers=maxconn, thread_name_prefix="db")
+        self.job_ids = itertools.count()
+        self.cursor_names = itertools.count()
+        self.running = {}
+        self.running_lock = threading.Lock()
+        self.results = queue.Queue()
+        self.closed = False
+        self.root.after(self.poll_interval, self.deliver_results)
+
+    def sql(self, query):
+        """Adapt a query written with psycopg2 %s placeholders to the connected database."""
+        return query if self.placeholder == "%s" else query.replace("%s", self.placeholder)
+
+    def run_job(self, job, job_id):
+        conn = self.pool.getconn()
+        cur = conn.cursor()
+        with self.running_lock:
+            self.running[job_id] = conn
+        try:
+            result = job(cur)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            with self.running_lock:
+                del self.running[job_id]
+            cur.close()
+            self.pool.putconn(conn)
+
+    def submit(self, job, callback=None, errback=None):
+        """Run job(cursor) on a worker; callback(result) or errback(error) is later called on the Tk thread."""
+        job_id = next(self.job_ids)
+        future = self.executor.submit(self.run_job, job, job_id)
+        future.job_id = job_id
+        future.add_done_callback(lambda done: self.results.put((done, callback, errback)))
+        return future
+
+    def execute(self, query, params=(), callback=None, errback=None):
+        def job(cur):
+            cur.execute(self.sql(query), params)
+            return cur.rowcount
+        return self.submit(job, callback, errback)
+
+    def fetchall(self, query, params=(), callback=None, errback=None):
+        def job(cur):
+            cur.execute(self.sql(query), params)
+            return cur.fetchall()
+        return self.submit(job, callback, errback)
+
+    def fetch_streamed(self, query, params=(), consume=list, itersize=STREAM_ITERSIZE, callback=None, errback=None):
+        """Run query and let consume(rows) reduce its rows on the worker without loading them all.
+
+        On PostgreSQL the rows come from a named (server-side) cursor, itersize rows per round trip;
+        callback receives whatever consume returns.
+        """
+        def job(cur):
+            if self.placeholder == "%s":
+                cur = cur.connection.cursor(name=f"stream_{next(self.cursor_names)}")
+                cur.itersize = itersize
+            try:
+                cur.execute(self.sql(query), params)
+                return consume(cur)
+            finally:
+                cur.close()
+        return self.submit(job, callback, errback)
+
+    def executemany(self, query, params_seq, callback=None, errback=None):
+        """Run query once per parameter tuple in a single round trip batch and transaction."""
+        def job(cur):
+            if self.placeholder == "%s":
+                psycopg2.extras.execute_batch(cur, query, params_seq)
+            else:
+                cur.executemany(self.sql(query), params_seq)
+            return len(params_seq)
+        return self.submit(job, callback, errback)
+
+    def insert_batch(self, cur, table, columns, rows):
+        """Multi-row INSERT of rows through cur: execute_values on PostgreSQL, executemany on SQLite."""
+        names = ", ".join(columns)
+        if self.placeholder == "%s":
+            psycopg2.extras.execute_values(cur, f"INSERT INTO {table} ({names}) VALUES %s", rows, page_size=len(rows))
+        else:
+            marks = ", ".join("?" * len(columns))
+            cur.executemany(f"INSERT INTO {table} ({names}) VALUES ({marks})", rows)
+
+    def import_products(self, path, batch_size=IMPORT_BATCH_SIZE, progress=None, callback=None, errback=None):
+        """Stream a .csv/.xlsx catalogue into products, committing every batch_size rows.
+
+        Only one batch is held in memory at a time. progress(imported) is called on the Tk
+        thread after each commit and callback(imported) once the whole file is in. If a row
+        is invalid the batches before it stay committed.
+        """
+        def job(cur):
+            imported = 0
+            for batch in iter_batches(iter_product_rows(path), batch_size):
+                self.insert_batch(cur, "products", PRODUCT_IMPORT_COLUMNS, batch)
+                cur.connection.commit()
+                imported += len(batch)
+                if progress is not None:
+                    self.post(progress, imported)
+            return imported
+        return self.submit(job, callback, errback)
+
+    def post(self, callback, value):
+        """Call callback(value) on the Tk thread, e.g. progress reports from inside a running job."""
+        done = Future()
+        done.set_result(value)
+        self.results.put((done, callback, None))
+
+    def cancel(self, future):
+        """Drop a queued job, or ask the server to cancel it if its query is already running."""
+        if future.cancel():
+            return
+        with self.running_lock:
+            conn = self.running.get(future.job_id)
+            if conn is not None:
+                self.cancel_query(conn)
+
+    @staticmethod
+    def cancel_query(conn):
+        if isinstance(conn, sqlite3.Connection):
+            conn.interrupt()
+        else:
+            conn.cancel()
+
+    def deliver_results(self):
+        while True:
+            try:
+                future, callback, errback = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if future.cancelled():
+                continue
+            error = future.exception()
+            try:
+                if error is not None:
+                    (errback or self.report_error)(error)
+                elif callback is not None:
+                    callback(future.result())
+            except Exception as callback_error:
+                self.report_error(callback_error)
+        if not self.closed:
+            self.root.after(self.poll_interval, self.deliver_results)
+
+    def report_error(self, error):
+        self.root.report_callback_exception(type(error), error, error.__traceback__)
+
+    def close(self):
+        """Drop queued jobs and cancel running queries without waiting for them on the Tk thread."""
+        self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        with self.running_lock:
+            for conn in self.running.values():
+                self.cancel_query(conn)
+        # З'єднання закриваються у фоні, коли перервані задачі повернуть їх у пул
+        threading.Thread(target=self.close_pool, name="db-close", daemon=True).start()
+
+    def close_pool(self):
+        self.executor.shutdown(wait=True)
+        self.pool.closeall()
+
+
+def apply_migrations(conn, directory=MIGRATIONS_DIR):
+    """Apply the .sql files of directory that are not recorded in schema_migrations yet, in name order.
+
+    Runs in autocommit mode, because CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    """
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY, applied_at TIMESTAMP DEFAULT now())")
+        cur.execute("SELECT name FROM schema_migrations")
+        applied = {name for name, in cur.fetchall()}
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".sql") or name in applied:
+                continue
+            with open(os.path.join(directory, name)) as file:
+                statements = [statement.strip() for statement in file.read().split(";")]
+            for statement in statements:
+                if statement and not all(line.startswith("--") for line in statement.splitlines()):
+                    cur.execute(statement)
+            cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+            print(f"Applied {name}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["migrate"]:
+        connection = psycopg2.connect(**POSTGRES_PARAMS)
+        try:
+            apply_migrations(connection)
+        finally:
+            connection.close()
+    else:
+        print("usage: python crm_db.py migrate")
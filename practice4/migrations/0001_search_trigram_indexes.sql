@@ -0,0 +1,12 @@
+-- Trigram indexes for the CRM search: LOWER(column) LIKE '%keyword%' can use them,
+-- unlike B-tree indexes, which only help prefix matches.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS users_username_lower_trgm_idx
+    ON users USING gin (LOWER(username) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS products_product_name_lower_trgm_idx
+    ON products USING gin (LOWER(product_name) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS advertisements_ad_name_lower_trgm_idx
+    ON advertisements USING gin (LOWER(ad_name) gin_trgm_ops);
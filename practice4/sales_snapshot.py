@@ -0,0 +1,127 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+# Продажі агрегуються блоками по стільки sale_id; графік групує блоки далі
+SNAPSHOT_BLOCK_SIZE = 1000
+
+# Продажі від початку передостаннього блоку знімка, вже згруповані по блоках
+NEW_SALES_QUERY = """
+SELECT sale_id / %s AS block, MIN(sale_id), MAX(sale_id), SUM(revenue), COUNT(*)
+FROM sales
+WHERE sale_id >= %s
+GROUP BY 1
+ORDER BY 1
+"""
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sales_blocks (
+    block INTEGER PRIMARY KEY,
+    first_sale_id INTEGER NOT NULL,
+    last_sale_id INTEGER NOT NULL,
+    revenue REAL NOT NULL,
+    sales INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_sale_id INTEGER NOT NULL,
+    refreshed_at TEXT NOT NULL
+);
+"""
+
+
+def snapshot_dir():
+    """CRM_SNAPSHOT_DIR if set, otherwise an adv_agency_crm folder in the user's cache directory."""
+    if os.environ.get('CRM_SNAPSHOT_DIR'):
+        return os.environ['CRM_SNAPSHOT_DIR']
+    if sys.platform == 'win32':
+        cache_dir = os.environ.get('LOCALAPPDATA') or os.path.expanduser(os.path.join('~', 'AppData', 'Local'))
+    else:
+        cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache'))
+    return os.path.join(cache_dir, 'adv_agency_crm')
+
+
+def snapshot_path(source):
+    """Snapshot file of one database, so switching databases never mixes their sales."""
+    key = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return os.path.join(snapshot_dir(), f"sales_snapshot-{key}.sqlite3")
+
+
+class SalesSnapshot:
+    """Local materialised summary of the sales table, refreshed with only its newest rows.
+
+    Sales are summed per block of SNAPSHOT_BLOCK_SIZE sale ids and stored in a SQLite file
+    (one per `source` database) together with the last sale_id seen. A refresh re-aggregates
+    the block before the last sale_id and everything after it, replacing those blocks, so a
+    sale that commits after a higher id was already seen is still counted as long as it is
+    less than a block behind. Older late sales, edits and deletes are not picked up until
+    clear() forces a rebuild.
+    """
+
+    def __init__(self, source, path=None, block_size=SNAPSHOT_BLOCK_SIZE):
+        path = path or snapshot_path(source)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SNAPSHOT_SCHEMA)
+
+    def state(self):
+        """(last_sale_id, refreshed_at) of the snapshot, or (0, None) before the first refresh."""
+        with self.lock:
+            row = self.conn.execute("SELECT last_sale_id, refreshed_at FROM snapshot_state").fetchone()
+        if row is None:
+            return 0, None
+        return row[0], datetime.fromisoformat(row[1])
+
+    def refresh_params(self):
+        """(block size, first sale_id) for NEW_SALES_QUERY: the start of the block before the last sale_id."""
+        first_block = max(0, self.state()[0] // self.block_size - 1)
+        return self.block_size, first_block * self.block_size
+
+    def merge(self, rows, first_sale_id):
+        """Replace the blocks from first_sale_id on with NEW_SALES_QUERY rows; return the number of new sales."""
+        first_block = first_sale_id // self.block_size
+        with self.lock, self.conn:
+            before = self.conn.execute(
+                "SELECT COALESCE(SUM(sales), 0) FROM sales_blocks WHERE block >= ?", (first_block,)
+            ).fetchone()[0]
+            self.conn.execute("DELETE FROM sales_blocks WHERE block >= ?", (first_block,))
+            self.conn.executemany(
+                "INSERT INTO sales_blocks (block, first_sale_id, last_sale_id, revenue, sales) VALUES (?, ?, ?, ?, ?)",
+                ((block, first, last, float(revenue or 0), count) for block, first, last, revenue, count in rows),
+            )
+            after = self.conn.execute(
+                "SELECT COALESCE(SUM(sales), 0) FROM sales_blocks WHERE block >= ?", (first_block,)
+            ).fetchone()[0]
+            last_sale_id = self.conn.execute("SELECT COALESCE(MAX(last_sale_id), 0) FROM sales_blocks").fetchone()[0]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO snapshot_state (id, last_sale_id, refreshed_at) VALUES (1, ?, ?)",
+                (last_sale_id, datetime.now().isoformat(timespec="seconds")),
+            )
+        return after - before
+
+    def frame(self, buckets):
+        """At most `buckets` rows of revenue per sale_id range, from the stored blocks only."""
+        with self.lock:
+            df = pd.read_sql_query(
+                "SELECT first_sale_id, last_sale_id, revenue, sales FROM sales_blocks ORDER BY block", self.conn
+            )
+        df.columns = ['First Sale ID', 'Last Sale ID', 'Revenue', 'Sales']
+        if len(df) > buckets:
+            group = df.index // -(-len(df) // buckets)
+            df = df.groupby(group).agg({'First Sale ID': 'min', 'Last Sale ID': 'max', 'Revenue': 'sum', 'Sales': 'sum'})
+        return df
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM sales_blocks")
+            self.conn.execute("DELETE FROM snapshot_state")
+
+    def close(self):
+        self.conn.close()
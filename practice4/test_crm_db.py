@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from crm_db import Database, SQLitePool
+
+# Рекурсивний запит, що рахує довше, ніж триває тест, доки його не перервуть
+ENDLESS_QUERY = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n"
+
+
+class FakeRoot:
+    """Stands in for the Tk root: after() callbacks run only when the test calls run_after()."""
+
+    def __init__(self):
+        self.pending = []
+        self.errors = []
+
+    def after(self, ms, func):
+        self.pending.append(func)
+
+    def run_after(self):
+        pending, self.pending = self.pending, []
+        for func in pending:
+            func()
+
+    def report_callback_exception(self, exc_type, error, tb):
+        self.errors.append(error)
+
+    def drive(self, condition, timeout=5.0):
+        """Run after() callbacks until condition() holds, as the Tk main loop would."""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, "timed out waiting for the Tk callbacks"
+            self.run_after()
+            time.sleep(0.01)
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+@pytest.fixture
+def db(root, tmp_path):
+    db = Database(root, sqlite_path=str(tmp_path / "crm.sqlite3"), maxconn=2, poll_interval=1)
+    yield db
+    db.close()
+
+
+def test_execute_and_fetchall_deliver_on_the_root(db, root):
+    results, threads = [], []
+
+    def callback(result):
+        results.append(result)
+        threads.append(threading.current_thread())
+
+    db.execute("INSERT INTO products (product_name, price) VALUES (%s, %s)", ("Coffee", 5), callback=callback)
+    root.drive(lambda: results)
+    db.fetchall("SELECT product_name, price FROM products", callback=callback)
+    root.drive(lambda: len(results) == 2)
+    assert results == [1, [("Coffee", 5)]]
+    assert threads == [threading.main_thread()] * 2
+
+
+def test_executemany_inserts_every_row(db, root):
+    results = []
+    rows = [(f"Product {index}", index) for index in range(50)]
+    db.executemany("INSERT INTO products (product_name, price) VALUES (%s, %s)", rows, callback=results.append)
+    root.drive(lambda: results)
+    db.fetchall("SELECT COUNT(*) FROM products", callback=results.append)
+    root.drive(lambda: len(results) == 2)
+    assert results == [50, [(50,)]]
+
+
+def test_errors_go_to_errback_or_report_callback_exception(db, root):
+    errors = []
+    db.fetchall("SELECT * FROM missing_table", errback=errors.append)
+    db.fetchall("SELECT * FROM missing_table")
+    root.drive(lambda: errors and root.errors)
+    assert isinstance(errors[0], sqlite3.OperationalError)
+    assert isinstance(root.errors[0], sqlite3.OperationalError)
+
+
+def test_cancel_queued_and_running_jobs(db, root):
+    results, errors = [], []
+    release = threading.Event()
+    blockers = [db.submit(lambda cur: release.wait(5)) for _ in range(2)]
+    queued = db.fetchall("SELECT 1", callback=results.append)
+    db.cancel(queued)
+    assert queued.cancelled()
+    release.set()
+    root.drive(lambda: all(blocker.done() for blocker in blockers))
+
+    running = db.fetchall(ENDLESS_QUERY, callback=results.append, errback=errors.append)
+    root.drive(lambda: running.job_id in db.running)
+    # interrupt() only stops a statement that already runs, so repeat it until the job fails
+    root.drive(lambda: db.cancel(running) or errors)
+    assert isinstance(errors[0], sqlite3.OperationalError) and results == []
+
+
+def test_close_does_not_wait_for_running_jobs(db, root):
+    release = threading.Event()
+    running = [db.submit(lambda cur: release.wait(5)) for _ in range(2)]
+    root.drive(lambda: len(db.running) == 2)
+    queued = db.fetchall("SELECT 1")
+    started = time.monotonic()
+    db.close()
+    assert time.monotonic() - started < 1
+    assert queued.cancelled() and not any(future.done() for future in running)
+    release.set()
+    assert all(future.result(timeout=5) for future in running)
+
+
+def test_sqlite_pool_never_exceeds_maxconn(tmp_path):
+    pool = SQLitePool(0, 3, str(tmp_path / "crm.sqlite3"))
+    start = threading.Barrier(8)
+    taken = []
+
+    def take():
+        start.wait()
+        conn = pool.getconn()
+        taken.append(conn)
+        time.sleep(0.05)
+        pool.putconn(conn)
+
+    threads = [threading.Thread(target=take) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pool.created <= 3 and len({id(conn) for conn in taken}) <= 3
+    pool.closeall()
@@ -0,0 +1,77 @@
+import os
+import sqlite3
+
+import pytest
+from crm_db import SQLITE_SCHEMA
+from sales_snapshot import NEW_SALES_QUERY, SalesSnapshot, snapshot_path
+
+FULL_QUERY = """
+SELECT MIN(sale_id), MAX(sale_id), SUM(revenue), COUNT(*)
+FROM sales
+GROUP BY sale_id / ?
+ORDER BY 1
+"""
+
+
+@pytest.fixture
+def sales_db():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SQLITE_SCHEMA)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    snapshot = SalesSnapshot("sqlite:test", path=str(tmp_path / "snapshot.sqlite3"), block_size=100)
+    yield snapshot
+    snapshot.close()
+
+
+def insert_sales(conn, sale_ids):
+    conn.executemany("INSERT INTO sales (sale_id, quantity, revenue) VALUES (?, 1, ?)",
+                     [(sale_id, sale_id * 1.5) for sale_id in sale_ids])
+
+
+def refresh(conn, snapshot):
+    block_size, first_sale_id = snapshot.refresh_params()
+    rows = conn.execute(NEW_SALES_QUERY.replace("%s", "?"), (block_size, first_sale_id)).fetchall()
+    return snapshot.merge(rows, first_sale_id)
+
+
+def full_group_by(conn, block_size):
+    return [tuple(row) for row in conn.execute(FULL_QUERY, (block_size,))]
+
+
+def snapshot_rows(snapshot):
+    return [tuple(row) for row in snapshot.frame(buckets=1000).itertuples(index=False)]
+
+
+def test_refresh_counts_late_and_new_sales(sales_db, snapshot):
+    insert_sales(sales_db, [sale_id for sale_id in range(1, 351) if sale_id not in (280, 330)])
+    assert refresh(sales_db, snapshot) == 348
+    assert snapshot.state()[0] == 350
+    assert snapshot_rows(snapshot) == full_group_by(sales_db, 100)
+
+    # 280 commits late into a block the snapshot already read, 330 into the last one
+    insert_sales(sales_db, [280, 330] + list(range(351, 420)))
+    assert snapshot.refresh_params() == (100, 200)
+    assert refresh(sales_db, snapshot) == 71
+    assert snapshot.state()[0] == 419
+    assert snapshot_rows(snapshot) == full_group_by(sales_db, 100)
+
+
+def test_refresh_without_new_sales_changes_nothing(sales_db, snapshot):
+    insert_sales(sales_db, range(1, 251))
+    refresh(sales_db, snapshot)
+    before = snapshot_rows(snapshot)
+    assert refresh(sales_db, snapshot) == 0
+    assert snapshot_rows(snapshot) == before
+
+
+def test_snapshot_path_is_configurable(monkeypatch, tmp_path):
+    monkeypatch.setenv("CRM_SNAPSHOT_DIR", str(tmp_path))
+    path = snapshot_path("sqlite:/tmp/crm.sqlite3")
+    assert path.startswith(str(tmp_path)) and path != snapshot_path("postgresql://postgres@localhost/crm")
+    SalesSnapshot("sqlite:/tmp/crm.sqlite3").close()
+    assert os.path.exists(path)
@@ -0,0 +1,177 @@
+import argparse
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.api import VAR
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+from sarimax import BEER_COLUMN, ORDER, SEASONAL_ORDER, WARM_START_MAXITER, BeerProductionForecast
+from var import load_data
+
+HORIZON = 12
+FOLDS = 5
+
+
+def rolling_origins(nobs, horizon=HORIZON, folds=FOLDS, step=None, window=None):
+    """(train start, origin) of every fold, oldest first; the last fold forecasts the final `horizon` points.
+
+    Origins are `step` points apart (default `horizon`, so test periods do not overlap). Training
+    data expands from the start of the series, or slides with a fixed length when `window` is set.
+    """
+    step = step or horizon
+    origins = [nobs - horizon - step * index for index in reversed(range(folds))]
+    if origins[0] <= 0 or window is not None and origins[0] < window:
+        raise ValueError(f"{nobs} observations are too few for {folds} folds of horizon {horizon}")
+    return [(0 if window is None else origin - window, origin) for origin in origins]
+
+
+def undifference(forecast, history, order):
+    """Integrate a forecast of the order-th difference back to levels, starting from the history levels."""
+    levels = forecast
+    for lower in reversed(range(order)):
+        # Останнє значення (lower)-ї різниці історії плюс накопичена сума прогнозу
+        last = np.diff(history[-(lower + 1):], n=lower, axis=0)[-1]
+        levels = last + np.cumsum(levels, axis=0)
+    return levels
+
+
+class VarBacktest:
+    """VAR(lag_order) on the diff_order-th difference, as in var.py, forecasting levels.
+
+    The series is differenced once for all folds; each fold slices the differenced data.
+    """
+
+    def __init__(self, lag_order=5, diff_order=2):
+        self.lag_order = lag_order
+        self.diff_order = diff_order
+
+    def prepare(self, data, first_fold, horizon):
+        diff = data
+        for _ in range(self.diff_order):
+            diff = diff.diff()
+        return diff.to_numpy()
+
+    def forecast(self, data, state, train_start, origin, horizon):
+        train = state[max(train_start, self.diff_order):origin]
+        results = VAR(train).fit(self.lag_order)
+        predicted = results.forecast(train[-self.lag_order:], steps=horizon)
+        return undifference(predicted, data.to_numpy()[:origin], self.diff_order)
+
+
+class SarimaxBacktest:
+    """SARIMAX forecasts of a single-column frame, with the orders and differencing of sarimax.py.
+
+    The stationarity check of BeerProductionForecast on the data before the first origin
+    decides once whether the series is differenced, and forecasts are integrated back to levels. The first fold is fitted from
+    scratch once; the other folds reuse its parameters, either as the optimiser start
+    (refit='warm'), as they are with only the filter run over the fold's data
+    (refit='filter'), or not at all (refit='cold').
+    """
+
+    def __init__(self, order=ORDER, seasonal_order=SEASONAL_ORDER, refit='warm'):
+        self.order = order
+        self.seasonal_order = seasonal_order
+        self.refit = refit
+
+    def prepare(self, data, first_fold, horizon):
+        if data.shape[1] != 1:
+            raise ValueError(f"SarimaxBacktest forecasts a single series, got columns {list(data.columns)}")
+        series = data.iloc[:, 0]
+        train_start, origin = first_fold
+        # Стаціонарність перевіряємо лише на даних до першого прогнозу, без майбутніх точок
+        is_stationary = BeerProductionForecast(column=series.name, series=series.iloc[:origin],
+                                               headless=True).check_stationarity()
+        diff = BeerProductionForecast(column=series.name, series=series, headless=True).difference_series(is_stationary)
+        # Різниця без першої точки, вирівняна з рівнями (NaN на початку), як у VarBacktest
+        state = {'diff': diff.reindex(series.index).to_numpy(), 'diff_order': len(series) - len(diff),
+                 'params': None}
+        if self.refit != 'cold':
+            results = self.model(state, train_start, origin).fit(disp=False)
+            state.update(params=results.params, first_fold=tuple(first_fold), first_forecast=results.forecast(horizon))
+        return state
+
+    def model(self, state, train_start, origin):
+        return SARIMAX(state['diff'][max(train_start, state['diff_order']):origin], order=self.order,
+                       seasonal_order=self.seasonal_order)
+
+    def forecast(self, data, state, train_start, origin, horizon):
+        if state['params'] is not None and (train_start, origin) == state['first_fold']:
+            predicted = state['first_forecast']
+        else:
+            model = self.model(state, train_start, origin)
+            if state['params'] is None:
+                results = model.fit(disp=False)
+            elif self.refit == 'filter':
+                results = model.smooth(state['params'])
+            else:
+                results = model.fit(start_params=state['params'], maxiter=WARM_START_MAXITER, disp=False)
+            predicted = results.forecast(horizon)
+        return undifference(predicted.reshape(-1, 1), data.to_numpy()[:origin], state['diff_order'])
+
+
+def forecast_fold(model, data, state, train_start, origin, horizon):
+    warnings.filterwarnings("ignore")
+    return model.forecast(data, state, train_start, origin, horizon)
+
+
+def backtest(model, data, horizon=HORIZON, folds=FOLDS, step=None, window=None, workers=None):
+    """Rolling-origin backtest of a VarBacktest/SarimaxBacktest model on a DataFrame of levels.
+
+    Folds are forecast in parallel. Returns (summary, forecasts): RMSE and MAE per column and
+    horizon step over all folds, and the actual and forecast value of every fold and step.
+    """
+    fold_bounds = rolling_origins(len(data), horizon, folds, step, window)
+    state = model.prepare(data, fold_bounds[0], horizon)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(forecast_fold, model, data, state, train_start, origin, horizon)
+                   for train_start, origin in fold_bounds]
+        predictions = [future.result() for future in futures]
+
+    rows = []
+    for (_, origin), predicted in zip(fold_bounds, predictions):
+        actual = data.to_numpy()[origin:origin + horizon]
+        for step_index in range(horizon):
+            for column_index, column in enumerate(data.columns):
+                rows.append({
+                    'origin': data.index[origin],
+                    'step': step_index + 1,
+                    'column': column,
+                    'actual': actual[step_index, column_index],
+                    'forecast': predicted[step_index, column_index],
+                })
+    forecasts = pd.DataFrame(rows)
+    errors = forecasts['forecast'] - forecasts['actual']
+    summary = (forecasts.assign(squared=errors ** 2, absolute=errors.abs())
+               .groupby(['column', 'step'])
+               .agg(rmse=('squared', lambda squared: np.sqrt(squared.mean())), mae=('absolute', 'mean'),
+                    folds=('origin', 'count')))
+    return summary, forecasts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the practice6 forecasters.")
+    parser.add_argument('model', choices=['var', 'sarimax'])
+    parser.add_argument('--horizon', type=int, default=HORIZON)
+    parser.add_argument('--folds', type=int, default=FOLDS)
+    parser.add_argument('--step', type=int, default=None, help="points between fold origins (default: horizon)")
+    parser.add_argument('--window', type=int, default=None, help="sliding training window; expanding by default")
+    parser.add_argument('--lag-order', type=int, default=5, help="VAR order")
+    parser.add_argument('--refit', choices=['warm', 'filter', 'cold'], default='warm', help="SARIMAX fold fits")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.model == 'var':
+        data, model = load_data(), VarBacktest(args.lag_order)
+    else:
+        csv_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "monthly-beer-production-in-austr.csv")
+        data = BeerProductionForecast(csv_file_path).df[[BEER_COLUMN]]
+        model = SarimaxBacktest(refit=args.refit)
+    summary, _ = backtest(model, data, args.horizon, args.folds, args.step, args.window, args.workers)
+    print(summary.to_string())
+
+
+if __name__ == "__main__":
+    main()
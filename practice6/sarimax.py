@@ -1,73 +1,469 @@
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import math
 import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from statsmodels.tools.eval_measures import rmse
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from statsmodels.tsa.stattools import adfuller
 
+BEER_COLUMN = 'Monthly beer production'
+ORDER = (2, 1, 1)
+SEASONAL_ORDER = (4, 0, 3, 12)
+# Останні місяці ряду, на яких перевіряється прогноз
+TEST_SIZE = 12
+# Ітерацій оптимізатора при старті з кешованих параметрів: кілька нових місяців мало зсувають оптимум
+WARM_START_MAXITER = 10
+# Пошук порядків: дешеві підгонки для відсіву, частка кандидатів, що проходить далі,
+# і ліміт часу на одну підгонку (с)
+SEARCH_PRUNE_MAXITER = 5
+SEARCH_FULL_MAXITER = 50
+SEARCH_KEEP = 0.25
+SEARCH_TIME_BUDGET = 60.0
+
+
+def data_hash(values):
+    return hashlib.sha1(np.ascontiguousarray(values, dtype=np.float64).tobytes()).hexdigest()
+
+
+class FitBudgetExceeded(Exception):
+    pass
+
+
+def order_grid(p=range(3), d=(1,), q=range(3), P=range(2), D=(0,), Q=range(2), s=12):
+    """(order, seasonal_order) candidates for every combination of the given values.
+
+    By default d and D are fixed to those of ORDER and SEASONAL_ORDER, so the candidates'
+    information criteria are comparable.
+    """
+    return [((p_, d_, q_), (P_, D_, Q_, s)) for p_, d_, q_, P_, D_, Q_ in itertools.product(p, d, q, P, D, Q)]
+
+
+def differencing_orders(candidates):
+    """The distinct (d, D) pairs among (order, seasonal_order) candidates."""
+    return {(order[1], seasonal_order[1]) for order, seasonal_order in candidates}
+
+
+def evaluate_order(train_data, validation_data, order, seasonal_order, maxiter, budget):
+    """Fit one candidate with at most maxiter iterations and `budget` seconds and score it on validation_data."""
+    warnings.filterwarnings("ignore")
+    started = time.perf_counter()
+
+    def check_budget(params):
+        if time.perf_counter() - started > budget:
+            raise FitBudgetExceeded
+
+    row = {'order': tuple(order), 'seasonal_order': tuple(seasonal_order), 'maxiter': maxiter, 'budget': budget}
+    try:
+        result = SARIMAX(train_data, order=order, seasonal_order=seasonal_order).fit(
+            maxiter=maxiter, callback=check_budget, disp=False)
+        end = len(train_data) + len(validation_data) - 1
+        pred = result.predict(start=len(train_data), end=end, typ="levels")
+    except FitBudgetExceeded:
+        row['status'] = 'timeout'
+    except Exception as error:
+        # Кандидат, що впав з будь-якої причини, не зупиняє пошук
+        row['status'] = f'failed: {type(error).__name__}: {error}'
+    else:
+        row.update(status='ok', aic=result.aic, bic=result.bic, validation_rmse=rmse(validation_data, pred))
+    row['seconds'] = time.perf_counter() - started
+    return row
+
+
+class ModelCache:
+    """Fitted SARIMAX parameters on disk, one JSON file per series name and model order.
+
+    An entry remembers the length and hash of the data it was fitted on, so a later fit on the
+    same data only runs the filter with the stored parameters, and a fit on the same data plus
+    new observations starts the optimiser from them instead of from scratch.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name, order, seasonal_order):
+        key = hashlib.sha1(repr((name, tuple(order), tuple(seasonal_order))).encode()).hexdigest()
+        return os.path.join(self.directory, f'{key}.json')
+
+    def load(self, name, order, seasonal_order):
+        try:
+            with open(self.path(name, order, seasonal_order)) as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, name, order, seasonal_order, entry):
+        self.write(self.path(name, order, seasonal_order), entry)
+
+    def search_path(self, train_data, validation_data):
+        return os.path.join(self.directory, f'search-{data_hash(train_data)}-{data_hash(validation_data)}.json')
+
+    def load_search(self, train_data, validation_data):
+        """Order-search rows already evaluated on exactly this train/validation split, keyed by candidate and stage."""
+        try:
+            with open(self.search_path(train_data, validation_data)) as file:
+                rows = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        for row in rows.values():
+            row['order'], row['seasonal_order'] = tuple(row['order']), tuple(row['seasonal_order'])
+        return rows
+
+    def save_search(self, train_data, validation_data, rows):
+        self.write(self.search_path(train_data, validation_data), rows)
+
+    def write(self, path, data):
+        # Запис через тимчасовий файл: паралельні процеси не побачать половину JSON
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(data, file)
+        os.replace(temporary, path)
+
 
 class BeerProductionForecast:
-    def __init__(self, csv_file_path):
-        self.df = pd.read_csv(csv_file_path)
-        self.df['Month'] = pd.to_datetime(self.df['Month'])
-        self.df.set_index('Month', inplace=True)
+    def __init__(self, csv_file_path=None, column=BEER_COLUMN, series=None, headless=False,
+                 order=ORDER, seasonal_order=SEASONAL_ORDER, model_cache=None, refit=True):
+        """Forecast one monthly series: `column` of a CSV indexed by 'Month', or a ready `series`.
+
+        headless=True skips every plot and print, for batch runs in worker processes.
+        With a ModelCache, fits reuse the parameters cached for this column and order; when
+        new observations were added since, refit=True warm-starts the optimiser from them and
+        refit=False only runs the filter over the extended data.
+        """
+        if series is not None:
+            self.df = series.rename(column).to_frame()
+        else:
+            self.df = pd.read_csv(csv_file_path)
+            self.df['Month'] = pd.to_datetime(self.df['Month'])
+            self.df.set_index('Month', inplace=True)
+        self.column = column
+        self.headless = headless
+        self.order = order
+        self.seasonal_order = seasonal_order
+        self.model_cache = model_cache
+        self.refit = refit
+        self.fit_info = None
 
     def visualize_time_series(self):
+        if self.headless:
+            return
         plt.figure(figsize=(10, 6))
-        plt.plot(self.df.index, self.df['Monthly beer production'], label='Monthly beer production')
-        plt.title('Monthly beer production over Time')
+        plt.plot(self.df.index, self.df[self.column], label=self.column)
+        plt.title(f'{self.column} over Time')
         plt.xlabel('Month')
-        plt.ylabel('Monthly beer production')
+        plt.ylabel(self.column)
         plt.legend()
         plt.show()
 
     def check_stationarity(self):
-        result = adfuller(self.df['Monthly beer production'])
-        print('ADF Statistic:', result[0])
-        print('p-value:', result[1])
-        print('Critical Values:')
-        for key, value in result[4].items():
-            print('\t%s: %.3f' % (key, value))
+        result = adfuller(self.df[self.column])
+        self.adf_pvalue = result[1]
+        if not self.headless:
+            print('ADF Statistic:', result[0])
+            print('p-value:', result[1])
+            print('Critical Values:')
+            for key, value in result[4].items():
+                print('\t%s: %.3f' % (key, value))
         return result[1] > 0.05
 
     def difference_series(self, is_stationary):
         if is_stationary:
-            diff = self.df['Monthly beer production']
+            diff = self.df[self.column]
         else:
-            diff = self.df['Monthly beer production'].diff().dropna()
-        plt.figure(figsize=(10, 6))
-        plt.plot(diff.index, diff, label='Differenced Monthly beer production')
-        plt.title('Differenced Monthly beer production over Time')
-        plt.xlabel('Month')
-        plt.ylabel('Differenced Monthly beer production')
-        plt.legend()
-        plt.show()
+            diff = self.df[self.column].diff().dropna()
+        if not self.headless:
+            plt.figure(figsize=(10, 6))
+            plt.plot(diff.index, diff, label=f'Differenced {self.column}')
+            plt.title(f'Differenced {self.column} over Time')
+            plt.xlabel('Month')
+            plt.ylabel(f'Differenced {self.column}')
+            plt.legend()
+            plt.show()
         return diff
 
-    def train_and_forecast(self, diff):
-        train_data = diff[:len(diff) - 12]
-        test_data = diff[len(diff) - 12:]
-        arima_model = SARIMAX(train_data, order=(2, 1, 1), seasonal_order=(4, 0, 3, 12))
-        arima_result = arima_model.fit()
+    def fit_model(self, train_data):
+        """Fit SARIMAX on train_data, from the cached parameters where the data allows.
+
+        Sets self.fit_info to the fit mode ('cold', 'warm', 'cached' or 'filtered'), its
+        duration and the seconds saved against the cold fit that produced the cache entry.
+        """
+        model = SARIMAX(train_data, order=self.order, seasonal_order=self.seasonal_order)
+        disp = False if self.headless else 5
+        values = np.asarray(train_data, dtype=np.float64)
+        entry = None
+        if self.model_cache is not None:
+            entry = self.model_cache.load(self.column, self.order, self.seasonal_order)
+            if entry is not None and (len(values) < entry['nobs']
+                                      or data_hash(values[:entry['nobs']]) != entry['data_hash']):
+                entry = None  # інші дані: кеш не підходить
+
+        started = time.perf_counter()
+        if entry is None:
+            mode, result = 'cold', model.fit(disp=disp)
+        elif len(values) == entry['nobs']:
+            mode, result = 'cached', model.smooth(entry['params'])
+        elif not self.refit:
+            mode, result = 'filtered', model.smooth(entry['params'])
+        else:
+            mode, result = 'warm', model.fit(start_params=entry['params'], maxiter=WARM_START_MAXITER, disp=disp)
+        seconds = time.perf_counter() - started
+
+        cold_seconds = seconds if entry is None else entry['cold_fit_seconds']
+        if self.model_cache is not None and mode in ('cold', 'warm'):
+            self.model_cache.save(self.column, self.order, self.seasonal_order, {
+                'nobs': len(values),
+                'data_hash': data_hash(values),
+                'params': [float(param) for param in result.params],
+                'cold_fit_seconds': cold_seconds,
+            })
+        self.fit_info = {'mode': mode, 'seconds': seconds, 'saved_seconds': max(0.0, cold_seconds - seconds)}
+        return result
+
+    def fit_and_forecast(self, diff):
+        """Fit SARIMAX on all but the last TEST_SIZE points and forecast them.
+
+        Returns (test data, forecast, RMSE, MSE).
+        """
+        train_data = diff[:len(diff) - TEST_SIZE]
+        test_data = diff[len(diff) - TEST_SIZE:]
+        arima_result = self.fit_model(train_data)
         arima_pred = arima_result.predict(start=len(train_data), end=len(diff) - 1, typ="levels").rename(
             "ARIMA Predictions")
+        arima_rmse_error = rmse(test_data, arima_pred)
+        return test_data, arima_pred, arima_rmse_error, arima_rmse_error ** 2
+
+    def search_orders(self, diff, candidates=None, workers=None, budget=SEARCH_TIME_BUDGET, keep=SEARCH_KEEP,
+                      criterion=None, mixed_differencing=False):
+        """Rank (order, seasonal_order) candidates for this series in two parallel stages.
+
+        Every candidate first gets a cheap fit of SEARCH_PRUNE_MAXITER iterations; only the best
+        `keep` share by `criterion` is then fitted fully. Each fit is stopped after `budget`
+        seconds. The search never sees the last TEST_SIZE points that fit_and_forecast reports
+        on: candidates are fitted on the data before them except for a validation window of
+        another TEST_SIZE points, on which 'validation_rmse' is measured.
+        AIC and BIC are only comparable between candidates with the same differencing orders
+        (d, D), so the criterion defaults to 'aic'. Candidates with mixed (d, D) need
+        mixed_differencing=True and are ranked by 'validation_rmse'. With a model cache, rows
+        already evaluated on the same data are reused, so a repeated or extended search only
+        fits new candidates.
+        Returns a table ranked by the criterion of the full fits, followed by the pruned candidates.
+        """
+        train_data = diff[:len(diff) - 2 * TEST_SIZE]
+        validation_data = diff[len(diff) - 2 * TEST_SIZE:len(diff) - TEST_SIZE]
+        candidates = candidates or order_grid()
+        orders = sorted(differencing_orders(candidates))
+        if len(orders) > 1:
+            if not mixed_differencing:
+                raise ValueError(f"candidates mix differencing orders {orders}; pass mixed_differencing=True "
+                                 f"to rank them by validation_rmse")
+            criterion = criterion or 'validation_rmse'
+            if criterion != 'validation_rmse':
+                raise ValueError(f"{criterion} is not comparable across differencing orders {orders}")
+        criterion = criterion or 'aic'
+        known = {} if self.model_cache is None else self.model_cache.load_search(train_data, validation_data)
+
+        def evaluate(stage_candidates, maxiter):
+            keys = [f'{order}x{seasonal_order}@{maxiter}' for order, seasonal_order in stage_candidates]
+            # Кандидати, що не вклались у менший ліміт часу, пробуємо знову
+            missing = [(key, candidate) for key, candidate in zip(keys, stage_candidates)
+                       if key not in known or known[key]['status'] == 'timeout' and known[key]['budget'] < budget]
+            if missing:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(evaluate_order, train_data, validation_data, order, seasonal_order,
+                                               maxiter, budget)
+                               for _, (order, seasonal_order) in missing]
+                    for (key, _), future in zip(missing, futures):
+                        known[key] = future.result()
+                if self.model_cache is not None:
+                    self.model_cache.save_search(train_data, validation_data, known)
+            return [known[key] for key in keys]
+
+        cheap = evaluate(candidates, SEARCH_PRUNE_MAXITER)
+        fitted = sorted((row for row in cheap if row['status'] == 'ok'), key=lambda row: row[criterion])
+        survivors = fitted[:max(1, math.ceil(len(fitted) * keep))]
+        full = evaluate([(row['order'], row['seasonal_order']) for row in survivors], SEARCH_FULL_MAXITER)
+
+        survivor_keys = {(row['order'], row['seasonal_order']) for row in survivors}
+        rows = [dict(row, stage='full') for row in full]
+        rows += [dict(row, stage='pruned') for row in cheap if (row['order'], row['seasonal_order']) not in survivor_keys]
+        table = pd.DataFrame(rows, columns=['order', 'seasonal_order', 'stage', 'status', 'aic', 'bic',
+                                            'validation_rmse', 'seconds'])
+        table['full_ok'] = (table['stage'] == 'full') & (table['status'] == 'ok')
+        table = table.sort_values(['full_ok', criterion], ascending=[False, True], na_position='last')
+        return table.drop(columns='full_ok').reset_index(drop=True)
+
+    def train_and_forecast(self, diff):
+        test_data, arima_pred, arima_rmse_error, arima_mse_error = self.fit_and_forecast(diff)
         plt.figure(figsize=(10, 6))
         plt.plot(test_data.index, test_data, label='Actual')
         plt.plot(test_data.index, arima_pred, label='Forecast', color='red')
-        plt.title('Forecast vs Actual Monthly beer production')
+        plt.title(f'Forecast vs Actual {self.column}')
         plt.xlabel('Month')
-        plt.ylabel('Monthly beer production')
+        plt.ylabel(self.column)
         plt.legend()
         plt.show()
-        arima_rmse_error = rmse(test_data, arima_pred)
-        arima_mse_error = arima_rmse_error ** 2
-        mean_value = self.df['Monthly beer production'].mean()
+        mean_value = self.df[self.column].mean()
         print(f'MSE Error: {arima_mse_error}\nRMSE Error: {arima_rmse_error}\nMean: {mean_value}')
+        print(f"Fit: {self.fit_info['mode']} in {self.fit_info['seconds']:.2f} s, "
+              f"saved {self.fit_info['saved_seconds']:.2f} s")
+
+
+def forecast_series(name, series, order=ORDER, seasonal_order=SEASONAL_ORDER, cache_dir=None):
+    """Headless stationarity check, fit and forecast of one series, for a worker process.
+
+    Returns (metrics row, forecast frame with actual and forecast columns).
+    """
+    warnings.filterwarnings("ignore")
+    started = time.perf_counter()
+    forecaster = BeerProductionForecast(column=name, series=series, headless=True,
+                                        order=order, seasonal_order=seasonal_order,
+                                        model_cache=ModelCache(cache_dir) if cache_dir else None)
+    diff = forecaster.difference_series(forecaster.check_stationarity())
+    test_data, arima_pred, arima_rmse_error, arima_mse_error = forecaster.fit_and_forecast(diff)
+    metrics = {
+        'series': name,
+        'adf_pvalue': forecaster.adf_pvalue,
+        'rmse': arima_rmse_error,
+        'mse': arima_mse_error,
+        'mean': series.mean(),
+        'fit_seconds': time.perf_counter() - started,
+        'fit_mode': forecaster.fit_info['mode'],
+        'fit_saved_seconds': forecaster.fit_info['saved_seconds'],
+        'error': '',
+    }
+    forecast = pd.DataFrame({'actual': test_data.values, 'forecast': arima_pred.values}, index=test_data.index)
+    return metrics, forecast
+
+
+def load_wide_csv(path):
+    """One series per column of a CSV whose first column holds the months."""
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    return {str(column): df[column].dropna() for column in df.columns}
+
+
+def load_csv_directory(directory, column=None):
+    """One series per CSV file in directory: `column` of each file, or its first data column."""
+    series = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        series[os.path.splitext(os.path.basename(path))[0]] = df[column or df.columns[0]].dropna()
+    return series
+
+
+def safe_file_name(name):
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in name)
+
+
+def forecast_file_names(names):
+    """name -> CSV file name; names that clash after safe_file_name get a short hash of the original name.
+
+    Clashes are found ignoring case, for case-insensitive file systems.
+    """
+    safe = {name: safe_file_name(name) for name in names}
+    counts = {}
+    for file_name in safe.values():
+        counts[file_name.lower()] = counts.get(file_name.lower(), 0) + 1
+    return {name: (f'{file_name}-{hashlib.sha1(name.encode()).hexdigest()[:8]}'
+                   if counts[file_name.lower()] > 1 else file_name) + '.csv'
+            for name, file_name in safe.items()}
+
+
+def run_batch(series, output_dir, workers=None, order=ORDER, seasonal_order=SEASONAL_ORDER, cache_dir=None):
+    """Forecast every series of a name -> Series dict in a process pool without plotting.
+
+    Each forecast goes to <output_dir>/forecasts/<name>.csv as soon as it is ready and the
+    metrics of all series (with the error of any series that failed) to <output_dir>/metrics.csv.
+    Names that map to the same file name get a short hash of the name appended; the
+    'forecast_file' column of the metrics gives the file of every series.
+    """
+    file_names = forecast_file_names(series)
+    forecast_dir = os.path.join(output_dir, 'forecasts')
+    os.makedirs(forecast_dir, exist_ok=True)
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(forecast_series, name, values, order, seasonal_order, cache_dir): name
+                   for name, values in series.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                metrics, forecast = future.result()
+            except Exception as error:
+                rows.append({'series': name, 'error': f'{type(error).__name__}: {error}'})
+                continue
+            forecast.to_csv(os.path.join(forecast_dir, file_names[name]), index_label='Month')
+            rows.append(dict(metrics, forecast_file=file_names[name]))
+            print(f"{name}: RMSE {metrics['rmse']:.3f} ({metrics['fit_mode']} fit, {metrics['fit_seconds']:.1f} s)")
+    metrics = pd.DataFrame(rows, columns=['series', 'adf_pvalue', 'rmse', 'mse', 'mean', 'fit_seconds',
+                                          'fit_mode', 'fit_saved_seconds', 'forecast_file', 'error'])
+    metrics = metrics.sort_values('series')
+    print(f"Fit time saved by the model cache: {metrics['fit_saved_seconds'].sum():.1f} s")
+    metrics.to_csv(os.path.join(output_dir, 'metrics.csv'), index=False)
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SARIMAX forecast of the beer production series, or of many series in batch.")
+    parser.add_argument('--cache-dir', help="directory of the fitted-parameter cache; fits are not cached without it")
+    subparsers = parser.add_subparsers(dest='command')
+    batch = subparsers.add_parser('batch', help="forecast many series in parallel without plots")
+    batch.add_argument('input', help="wide CSV (one series per column) or a directory of CSV files")
+    batch.add_argument('output_dir')
+    batch.add_argument('--column', help="column to read from each CSV of a directory")
+    batch.add_argument('--workers', type=int, default=None)
+    search = subparsers.add_parser('search', help="rank SARIMAX orders for one series")
+    search.add_argument('--input', help="CSV indexed by 'Month'; the beer production data by default")
+    search.add_argument('--column', default=BEER_COLUMN)
+    search.add_argument('--workers', type=int, default=None)
+    search.add_argument('--budget', type=float, default=SEARCH_TIME_BUDGET, help="seconds allowed per fit")
+    search.add_argument('--keep', type=float, default=SEARCH_KEEP, help="share of candidates fitted fully")
+    search.add_argument('--d', type=int, nargs='+', default=[ORDER[1]], help="differencing orders to try")
+    search.add_argument('--D', type=int, nargs='+', default=[SEASONAL_ORDER[1]],
+                        help="seasonal differencing orders to try")
+    search.add_argument('--mixed-differencing', action='store_true',
+                        help="allow several d/D values, ranked by validation RMSE")
+    search.add_argument('--criterion', choices=['aic', 'bic', 'validation_rmse'], default=None,
+                        help="aic by default, validation_rmse with --mixed-differencing")
+    search.add_argument('--output', help="CSV file for the ranked table")
+    args = parser.parse_args()
+    model_cache = ModelCache(args.cache_dir) if args.cache_dir else None
+    csv_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "monthly-beer-production-in-austr.csv")
+
+    if args.command == 'search':
+        forecaster = BeerProductionForecast(args.input or csv_file_path, column=args.column, headless=True,
+                                            model_cache=model_cache)
+        diff = forecaster.difference_series(forecaster.check_stationarity())
+        table = forecaster.search_orders(diff, order_grid(d=args.d, D=args.D), workers=args.workers,
+                                         budget=args.budget, keep=args.keep, criterion=args.criterion,
+                                         mixed_differencing=args.mixed_differencing)
+        print(table.head(10).to_string())
+        if args.output:
+            table.to_csv(args.output, index=False)
+        return
+
+    if args.command == 'batch':
+        if os.path.isdir(args.input):
+            series = load_csv_directory(args.input, args.column)
+        else:
+            series = load_wide_csv(args.input)
+        run_batch(series, args.output_dir, args.workers, cache_dir=args.cache_dir)
+        return
+
+    beer_forecaster = BeerProductionForecast(csv_file_path, model_cache=model_cache)
+    beer_forecaster.visualize_time_series()
+    stationary = beer_forecaster.check_stationarity()
+    diff_series = beer_forecaster.difference_series(stationary)
+    beer_forecaster.train_and_forecast(diff_series)
 
 
-csv_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "monthly-beer-production-in-austr.csv")
-beer_forecaster = BeerProductionForecast(csv_file_path)
-beer_forecaster.visualize_time_series()
-stationary = beer_forecaster.check_stationarity()
-diff_series = beer_forecaster.difference_series(stationary)
-beer_forecaster.train_and_forecast(diff_series)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import SarimaxBacktest, rolling_origins, undifference
+from sarimax import BeerProductionForecast
+
+
+def test_rolling_origins_expanding():
+    assert rolling_origins(100, horizon=12, folds=5) == [(0, 40), (0, 52), (0, 64), (0, 76), (0, 88)]
+
+
+@pytest.mark.parametrize("nobs, horizon, folds, step, window", [
+    (100, 12, 5, None, None),
+    (100, 12, 5, 6, None),
+    (100, 6, 3, 1, None),
+    (100, 12, 4, None, 30),
+    (150, 1, 10, 3, 50),
+])
+def test_rolling_origins_bounds(nobs, horizon, folds, step, window):
+    bounds = rolling_origins(nobs, horizon, folds, step, window)
+    assert len(bounds) == folds
+    assert bounds[-1][1] + horizon == nobs
+    assert all(later[1] - earlier[1] == (step or horizon) for earlier, later in zip(bounds, bounds[1:]))
+    for train_start, origin in bounds:
+        assert 0 <= train_start < origin
+        assert origin - train_start == (origin if window is None else window)
+
+
+@pytest.mark.parametrize("nobs, horizon, folds, step, window", [
+    (60, 12, 5, None, None),
+    (30, 12, 3, None, None),
+    (100, 12, 5, None, 50),
+])
+def test_rolling_origins_too_short(nobs, horizon, folds, step, window):
+    with pytest.raises(ValueError):
+        rolling_origins(nobs, horizon, folds, step, window)
+
+
+@pytest.mark.parametrize("order", [0, 1, 2])
+@pytest.mark.parametrize("shape", [(40,), (40, 3)])
+def test_undifference_round_trip(order, shape):
+    levels = np.cumsum(np.cumsum(np.random.default_rng(order).normal(size=shape), axis=0), axis=0)
+    history, future = levels[:30], levels[30:]
+    differences = np.diff(levels, n=order, axis=0)
+    forecast = differences[30 - order:]
+    np.testing.assert_allclose(undifference(forecast, history, order), future)
+
+
+def test_sarimax_prepare_checks_stationarity_before_first_origin():
+    rng = np.random.default_rng(0)
+    # Стаціонарний шум до першого прогнозу, далі тренд, з яким уся серія нестаціонарна
+    values = np.concatenate([rng.normal(size=100), 5 * np.cumsum(rng.normal(1, 1, size=100))])
+    data = pd.DataFrame({'value': values}, index=pd.date_range('2000-01', periods=200, freq='MS'))
+    decision = {length: BeerProductionForecast(column='value', series=data['value'][:length],
+                                               headless=True).check_stationarity() for length in (100, 200)}
+    assert decision[100] != decision[200]
+    state = SarimaxBacktest(refit='cold').prepare(data, (0, 100), 12)
+    assert state['diff_order'] == (0 if decision[100] else 1)
+
+
+def test_sarimax_prepare_rejects_several_columns():
+    data = pd.DataFrame({'a': np.arange(50.0), 'b': np.arange(50.0)})
+    with pytest.raises(ValueError, match="single series"):
+        SarimaxBacktest(refit='cold').prepare(data, (0, 30), 12)
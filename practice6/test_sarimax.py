@@ -0,0 +1,12 @@
+from sarimax import forecast_file_names
+
+
+def test_forecast_file_names_keep_unique_names():
+    assert forecast_file_names(['Beer', 'SKU 1/2']) == {'Beer': 'Beer.csv', 'SKU 1/2': 'SKU_1_2.csv'}
+
+
+def test_forecast_file_names_hash_colliding_names():
+    names = forecast_file_names(['SKU 1/2', 'SKU 1_2', 'Wine', 'wine'])
+    assert len({name.lower() for name in names.values()}) == 4
+    assert names['SKU 1/2'].startswith('SKU_1_2-') and names['SKU 1_2'].startswith('SKU_1_2-')
+    assert names == forecast_file_names(['wine', 'Wine', 'SKU 1_2', 'SKU 1/2'])
@@ -1,5 +1,6 @@
 import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import matplotlib.pyplot as plt
 from pylab import rcParams
@@ -17,23 +18,18 @@ warnings.filterwarnings("ignore")
 ds1_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "M2SLMoneyStock.csv")
 ds2_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PCEPersonalSpending.csv")
 
-df = pd.read_csv(ds1_file_path, index_col=0, parse_dates=True)
-df.index.freq = 'MS'
+# Candidate VAR orders for lag selection
+MAX_LAG = 7
 
-sp = pd.read_csv(ds2_file_path, index_col=0, parse_dates=True)
-sp.index.freq = 'MS'
 
-df = df.join(sp)
+def load_data():
+    df = pd.read_csv(ds1_file_path, index_col=0, parse_dates=True)
+    df.index.freq = 'MS'
 
-# Plot settings
-title = 'M2 Money Stock vs Personal Consumption Expenditures'
-ylabel = 'Billions of Dollars'
-xlabel = '' 
+    sp = pd.read_csv(ds2_file_path, index_col=0, parse_dates=True)
+    sp.index.freq = 'MS'
 
-ax = df['Spending'].plot(legend=True, title=title)
-ax.autoscale(axis='x', tight=True)
-ax.set(xlabel=xlabel, ylabel=ylabel)
-df['Money'].plot(legend=True)
+    return df.join(sp)
 
 def dickey_fuller(series, title='Your Dataset'):
     print(f'Augmented Dickey Fuller Test for the dataset {title}')
@@ -57,66 +53,111 @@ def dickey_fuller(series, title='Your Dataset'):
         print('Fail to reject the null hypothesis')
         print('Data has a unit root and is non-stationary')
 
-dickey_fuller(df['Money'], title='Money')
-dickey_fuller(df['Spending'], title='Spending')
+def fit_lag_order(train, order):
+    """Fit VAR(order) on train once and return its information criteria."""
+    warnings.filterwarnings("ignore")  # також у процесах пулу
+    results = VAR(train).fit(order)
+    return {'order': order, 'aic': results.aic, 'bic': results.bic, 'hqic': results.hqic, 'fpe': results.fpe}
+
+
+def lag_order_tables(datasets, max_lag=MAX_LAG, workers=None):
+    """AIC/BIC table of VAR(1)..VAR(max_lag) for every training DataFrame in datasets (name -> DataFrame).
+
+    Every (dataset, order) pair is fitted exactly once; with workers != 1 the fits are spread
+    over one process pool shared by all datasets, so hundreds of series pairs keep it busy.
+    VAR(order) is fitted on train.iloc[max_lag - order:], so every order uses the same
+    len(train) - max_lag observations and their criteria are comparable.
+    """
+    orders = range(1, max_lag + 1)
+    tasks = [(name, train.iloc[max_lag - order:], order) for name, train in datasets.items() for order in orders]
+    if workers == 1:
+        rows = [fit_lag_order(train, order) for _, train, order in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(fit_lag_order, [task[1] for task in tasks], [task[2] for task in tasks],
+                                     chunksize=chunksize))
+
+    tables = {name: [] for name in datasets}
+    for (name, _, _), row in zip(tasks, rows):
+        tables[name].append(row)
+    return {name: pd.DataFrame(table).set_index('order') for name, table in tables.items()}
+
+
+def select_lag_order(train, max_lag=MAX_LAG, criterion='aic', workers=None):
+    """(best order by criterion, AIC/BIC table) for a single training DataFrame."""
+    table = lag_order_tables({'train': train}, max_lag, workers)['train']
+    return int(table[criterion].idxmin()), table
+
 
-df_diff = df.diff()
-df_diff = df_diff.dropna()
+def main():
+    df = load_data()
 
-dickey_fuller(df_diff['Money'], title='Money 1st Order Diff')
-dickey_fuller(df_diff['Spending'], title='Spending 1st Order Diff')
+    # Plot settings
+    title = 'M2 Money Stock vs Personal Consumption Expenditures'
+    ylabel = 'Billions of Dollars'
+    xlabel = ''
 
-df_diff = df_diff.diff().dropna()
-dickey_fuller(df_diff['Money'], title='Money 2nd Order Diff')
-dickey_fuller(df_diff['Spending'], title='Spending 2nd Order Diff')
+    ax = df['Spending'].plot(legend=True, title=title)
+    ax.autoscale(axis='x', tight=True)
+    ax.set(xlabel=xlabel, ylabel=ylabel)
+    df['Money'].plot(legend=True)
 
-nobs = 12
-train = df_diff[:-nobs]
-test = df_diff[-nobs:]
+    dickey_fuller(df['Money'], title='Money')
+    dickey_fuller(df['Spending'], title='Spending')
 
-p = [1, 2, 3, 4, 5, 6, 7] 
+    df_diff = df.diff()
+    df_diff = df_diff.dropna()
 
-results = None
-for i in p:
-    model = VAR(train)
-    results = model.fit(i)
-    print(f'VAR Order {i}')
-    print('AIC {}'.format(results.aic))
-    print('BIC {}'.format(results.bic))
+    dickey_fuller(df_diff['Money'], title='Money 1st Order Diff')
+    dickey_fuller(df_diff['Spending'], title='Spending 1st Order Diff')
+
+    df_diff = df_diff.diff().dropna()
+    dickey_fuller(df_diff['Money'], title='Money 2nd Order Diff')
+    dickey_fuller(df_diff['Spending'], title='Spending 2nd Order Diff')
+
+    nobs = 12
+    train = df_diff[:-nobs]
+    test = df_diff[-nobs:]
+
+    # Кожен порядок оцінюється один раз на спільній вибірці; сім малих підгонок швидші без пулу процесів
+    lag_order, table = select_lag_order(train, workers=1)
+    print(table.to_string())
+    print(f'Selected VAR order {lag_order} (AIC)')
     print()
 
-    results = model.fit(5)
-    results.summary()
+    results = VAR(train).fit(lag_order)
+    print(results.summary())
+    z = results.forecast(y=train.values[-lag_order:], steps=nobs)
+
+    df_forecast = pd.DataFrame(z, index=test.index, columns=['Money2D', 'Spending2D'])
 
-    lag_order = results.k_ar
-    z = results.forecast(y=train.values[-lag_order:], steps=12)
-    print(z)
+    df_forecast['Money1D'] = (df['Money'].iloc[-nobs-1] - df['Money'].iloc[-nobs-2]) + df_forecast['Money2D'].cumsum()
+    df_forecast['MoneyForecast'] = df['Money'].iloc[-nobs-1] + df_forecast['Money1D'].cumsum()
 
-idx = pd.date_range(start='1/1/2015', periods=12, freq='MS')
-df_forecast = pd.DataFrame(z, index=idx, columns=['Money2D', 'Spending2D'])
+    df_forecast['Spending1D'] = (df['Spending'].iloc[-nobs-1] - df['Spending'].iloc[-nobs-2]) + df_forecast['Spending2D'].cumsum()
+    df_forecast['SpendingForecast'] = df['Spending'].iloc[-nobs-1] + df_forecast['Spending1D'].cumsum()
 
-df_forecast['Money1D'] = (df['Money'].iloc[-nobs-1] - df['Money'].iloc[-nobs-2]) + df_forecast['Money2D'].cumsum()
-df_forecast['MoneyForecast'] = df['Money'].iloc[-nobs-1] + df_forecast['Money1D'].cumsum()
+    results.plot()
+    plt.show()
 
-df_forecast['Spending1D'] = (df['Spending'].iloc[-nobs-1] - df['Spending'].iloc[-nobs-2]) + df_forecast['Spending2D'].cumsum()
-df_forecast['SpendingForecast'] = df['Spending'].iloc[-nobs-1] + df_forecast['Spending1D'].cumsum()
+    results.plot_forecast(12)
+    plt.show()
 
-results.plot()
-plt.show()
+    df['Money'][-nobs:].plot(figsize=(12, 5), legend=True).autoscale(axis='x', tight=True)
+    df_forecast['MoneyForecast'].plot(legend=True)
 
-results.plot_forecast(12)
-plt.show()
+    df['Spending'][-nobs:].plot(figsize=(12, 5), legend=True).autoscale(axis='x', tight=True)
+    df_forecast['SpendingForecast'].plot(legend=True)
 
-df['Money'][-nobs:].plot(figsize=(12, 5), legend=True).autoscale(axis='x', tight=True)
-df_forecast['MoneyForecast'].plot(legend=True)
+    RMSE1 = rmse(df['Money'][-nobs:], df_forecast['MoneyForecast'])
+    print(f'Money VAR({lag_order}) RMSE: {RMSE1:.3f}')
 
-df['Spending'][-nobs:].plot(figsize=(12, 5), legend=True).autoscale(axis='x', tight=True)
-df_forecast['SpendingForecast'].plot(legend=True)
+    RMSE2 = rmse(df['Spending'][-nobs:], df_forecast['SpendingForecast'])
+    print(f'Spending VAR({lag_order}) RMSE: {RMSE2:.3f}')
 
-RMSE1 = rmse(df['Money'][-nobs:], df_forecast['MoneyForecast'])
-print(f'Money VAR(5) RMSE: {RMSE1:.3f}')
+    plt.show()
 
-RMSE2 = rmse(df['Spending'][-nobs:], df_forecast['SpendingForecast'])
-print(f'Spending VAR(5) RMSE: {RMSE2:.3f}')
 
-plt.show()
+if __name__ == "__main__":
+    main()
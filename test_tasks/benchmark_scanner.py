@@ -0,0 +1,80 @@
+import argparse
+import time
+import tracemalloc
+
+from scanner_handler import CheckQr, MembershipCache
+
+DEVICES = {f"{index:03d}" for index in range(500)} | {f"{index:05d}" for index in range(500)}
+
+
+class InMemoryCheckQr(CheckQr):
+    """CheckQr against an in-process set instead of the real DB."""
+
+    def check_in_db(self, qr):
+        return qr in DEVICES
+
+    def check_in_db_many(self, qrs):
+        return DEVICES.intersection(qrs)
+
+
+def make_scans(count: int):
+    """A mix of valid, unknown and wrong-length QR codes that repeat like real dock traffic."""
+    patterns = ["{:03d}", "{:05d}", "{:07d}", "{:04d}"]
+    return [patterns[index % 4].format(index % 700) for index in range(count)]
+
+
+def legacy_check(check_qr: CheckQr, qr: str):
+    """The closure-list chain check_scanned_device used before the fast path."""
+    for func in check_qr.scan_check_out_list(qr):
+        if func():
+            return
+    check_qr.can_add_device(f"hallelujah {qr}")
+
+
+def temporary_bytes(scan, scans) -> float:
+    """Average peak of memory allocated while one scan runs, i.e. the per-scan temporaries."""
+    total = 0
+    tracemalloc.start()
+    for qr in scans:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        scan(qr)
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return total / len(scans)
+
+
+def measure(name: str, scan, scans, batch: bool = False):
+    started = time.perf_counter()
+    if batch:
+        scan(scans)
+    else:
+        for qr in scans:
+            scan(qr)
+    elapsed = time.perf_counter() - started
+    # a batch allocates per burst, so spread its temporaries over the burst
+    sample = scans[:10_000]
+    if batch:
+        allocated = temporary_bytes(scan, [sample]) / len(sample)
+    else:
+        allocated = temporary_bytes(scan, sample)
+    print(f"{name:<16} {len(scans) / elapsed:14,.0f} scans/s {allocated:10.1f} allocated bytes/scan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark CheckQr validation paths.")
+    parser.add_argument("--scans", type=int, default=200_000)
+    args = parser.parse_args()
+    scans = make_scans(args.scans)
+
+    plain = InMemoryCheckQr()
+    cached = InMemoryCheckQr(cache=MembershipCache(maxsize=1000, ttl=60))
+    measure("legacy chain", lambda qr: legacy_check(plain, qr), scans)
+    measure("fast path", plain.check_scanned_device, scans)
+    measure("fast path+cache", cached.check_scanned_device, scans)
+    measure("batch", plain.check_scanned_devices, scans, batch=True)
+    print(f"cache: {cached.cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
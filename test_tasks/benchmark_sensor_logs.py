@@ -0,0 +1,121 @@
+import argparse
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from test_task1 import SensorAnalyzer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_2.log")
+MEMORY_ENGINES = ["process_sensor_logs", "process_sensor_logs_streaming", "process_sensor_logs_mmap"]
+
+
+def build_log(path: str, copies: int) -> int:
+    """Write the sample log `copies` times into path and return the number of lines."""
+    with open(SAMPLE_LOG, 'rb') as sample:
+        data = sample.read()
+    with open(path, 'wb') as file:
+        for _ in range(copies):
+            file.write(data)
+    return data.count(b"\n") * copies
+
+
+def run(name: str, func, lines: int):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<12} {elapsed:8.3f} s  {lines / elapsed:14,.0f} lines/s")
+    return result
+
+
+def peak_rss_mib() -> float:
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    import psutil
+    return psutil.Process().memory_info().peak_wset / 2 ** 20
+
+
+def traced_blocks(snapshot: tracemalloc.Snapshot) -> int:
+    return sum(stat.count for stat in snapshot.statistics('filename'))
+
+
+def memory_probe(log_path: str, engine: str):
+    """Run one engine in a fresh process.
+
+    Returns peak RSS and RSS growth in MiB, the peak of traced Python allocations in MiB,
+    the number of GC collections per generation during the run and the number of Python
+    memory blocks still allocated after it (the result included).
+    """
+    analyzer = SensorAnalyzer(log_path)
+    rss_before = peak_rss_mib()
+    collections_before = [stats['collections'] for stats in gc.get_stats()]
+    tracemalloc.start()
+    blocks_before = traced_blocks(tracemalloc.take_snapshot())
+    result = getattr(analyzer, engine)()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    blocks_after = traced_blocks(tracemalloc.take_snapshot())
+    tracemalloc.stop()
+    collections = [stats['collections'] - before for stats, before in zip(gc.get_stats(), collections_before)]
+    rss_after = peak_rss_mib()
+    del result
+    return rss_after, rss_after - rss_before, traced_peak / 2 ** 20, collections, blocks_after - blocks_before
+
+
+def report_memory(log_path: str, lines: int):
+    """Print peak RSS, the traced allocation peak, GC collections and retained blocks for every single-process engine.
+
+    GC collections (generations 0/1/2) and retained blocks are also given per million lines,
+    so runs with different --copies can be compared; peaks are not divided.
+    """
+    per_m = 1e6 / lines
+    print(f"{'engine':<32} {'peak RSS':>10} {'RSS growth':>11} {'traced peak':>12} "
+          f"{'GC gen0/1/2 per M lines':>24} {'blocks per M lines':>19}")
+    context = multiprocessing.get_context("spawn")
+    for engine in MEMORY_ENGINES:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            rss, growth, traced, collections, blocks = executor.submit(memory_probe, log_path, engine).result()
+        gc_rates = "/".join(f"{count * per_m:.1f}" for count in collections)
+        print(f"{engine:<32} {rss:6.1f} MiB {growth:7.1f} MiB {traced:8.2f} MiB {gc_rates:>24} {blocks * per_m:19,.0f}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SensorAnalyzer log processing engines.")
+    parser.add_argument("--copies", type=int, default=20, help="how many times app_2.log is repeated")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size for the parallel engine")
+    parser.add_argument("--memory", action="store_true", help="also report memory peaks, GC collections and retained allocations")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        log_path = os.path.join(tmp_dir, "bench.log")
+        lines = build_log(log_path, args.copies)
+        print(f"{lines:,} lines, {os.path.getsize(log_path) / 2 ** 20:.1f} MiB")
+
+        # Peak RSS survives fork/exec on Linux, so measure before this process grows.
+        if args.memory:
+            report_memory(log_path, lines)
+
+        analyzer = SensorAnalyzer(log_path)
+        expected = run("lines", analyzer.process_sensor_logs, lines)
+        streamed = run("streaming", analyzer.process_sensor_logs_streaming, lines)
+        assert streamed == expected, "streaming engine result differs"
+        mapped = run("mmap", analyzer.process_sensor_logs_mmap, lines)
+        assert mapped == expected, "mmap engine result differs"
+        parallel = run("parallel", lambda: analyzer.process_sensor_logs_parallel(args.workers), lines)
+        assert parallel == expected, "parallel engine result differs"
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
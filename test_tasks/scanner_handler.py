@@ -1,19 +1,133 @@
 
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+class ScanResult(NamedTuple):
+    qr: str
+    color: Optional[str]
+    error: Optional[str]
+    message: Optional[str]
+
+
+class TimedScan(NamedTuple):
+    qr: str
+    result: Optional[ScanResult]
+    latency: float
+    exception: Optional[BaseException] = None
+
+
+class MembershipCache:
+    """LRU cache of DB membership answers, bounded by maxsize, each answer valid for ttl seconds."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.entries: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, qr: str) -> Optional[bool]:
+        """Cached answer for qr, or None on a miss (absent or expired)."""
+        entry = self.entries.get(qr)
+        if entry is None or entry[1] <= self.clock():
+            if entry is not None:
+                del self.entries[qr]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(qr)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, qr: str, in_db: bool) -> bool:
+        """Remember in_db for qr and return it."""
+        self.entries[qr] = (in_db, self.clock() + self.ttl)
+        self.entries.move_to_end(qr)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return in_db
+
+    def partition(self, qrs: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """(cached QR codes that are in the DB, QR codes with no cached answer)."""
+        found, missing = set(), set()
+        for qr in qrs:
+            in_db = self.get(qr)
+            if in_db is None:
+                missing.add(qr)
+            elif in_db:
+                found.add(qr)
+        return found, missing
+
+    def set_many(self, qrs: Iterable[str], found: Set[str]) -> Set[str]:
+        """Remember the answers of one DB lookup of qrs that returned found, and return found."""
+        for qr in qrs:
+            self.set(qr, qr in found)
+        return found
+
+    def invalidate(self, qr: Optional[str] = None):
+        """Forget the answer for qr, or every answer if qr is None."""
+        if qr is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(qr, None)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self.entries)}
+
+
 class CheckQr:
-    def __init__(self):
+    COLORS = {
+        3: 'Red',
+        5: 'Green',
+        7: 'Fuzzy Wuzzy'
+    }
+
+    def __init__(self, cache: Optional[MembershipCache] = None):
         self.color = None
+        self.cache = cache
         self.check_out = lambda exp, callback: callback if exp else lambda: None
 
     def check_in_db(self, qr):
         raise ConnectionError
 
+    def is_in_db(self, qr: str) -> bool:
+        """check_in_db behind the membership cache, if one is configured."""
+        if self.cache is None:
+            return self.check_in_db(qr)
+        in_db = self.cache.get(qr)
+        if in_db is None:
+            in_db = self.cache.set(qr, bool(self.check_in_db(qr)))
+        return in_db
+
+    def filter_in_db(self, qrs: Iterable[str]) -> Set[str]:
+        """check_in_db_many behind the membership cache; only cache misses are queried."""
+        if self.cache is None:
+            return self.check_in_db_many(qrs)
+        found, missing = self.cache.partition(qrs)
+        if missing:
+            found |= self.cache.set_many(missing, self.check_in_db_many(missing))
+        return found
+
+    def invalidate_cache(self, qr: Optional[str] = None):
+        """Call when devices are added or removed, so cached answers for them are dropped."""
+        if self.cache is not None:
+            self.cache.invalidate(qr)
+
+    def check_in_db_many(self, qrs: Iterable[str]) -> Set[str]:
+        """Return the QR codes that are in the DB.
+
+        Override with one set-based query over a pooled connection
+        (e.g. SELECT qr FROM devices WHERE qr = ANY(%s)); by default every QR is checked with check_in_db.
+        """
+        return {qr for qr in qrs if self.check_in_db(qr)}
+
     def check_len_color(self, qr):
-        color = {
-            3: 'Red',
-            5: 'Green',
-            7: 'Fuzzy Wuzzy'
-        }
-        self.color = color.get(len(qr))
+        self.color = self.COLORS.get(len(qr))
         return self.color
 
     def scan_check_out_list(self, qr):
@@ -22,18 +136,49 @@ class CheckQr:
                 self.send_error(f"Error: Wrong qr length {len(qr)}")
             ]
                      ),
-            self.check_out(not self.check_in_db(qr), lambda: [
+            self.check_out(not self.is_in_db(qr), lambda: [
                 self.send_error("Not in DB")
             ]
                      )
         ]
 
     def check_scanned_device(self, qr: str):
-        for func in self.scan_check_out_list(qr):
-            if func():
-                return
-        message = f"hallelujah {qr}"
-        self.can_add_device(message)
+        # Same checks and errors as scan_check_out_list, but the DB is only asked once the
+        # length check passed and no closures are built per scan.
+        if not self.check_len_color(qr):
+            self.send_error(f"Error: Wrong qr length {len(qr)}")
+            return
+        if not self.is_in_db(qr):
+            self.send_error("Not in DB")
+            return
+        self.can_add_device(f"hallelujah {qr}")
+
+    def check_scanned_devices(self, qrs: Iterable[str]) -> List[ScanResult]:
+        """Validate a burst of scans with a single DB lookup.
+
+        Errors and messages are the same as check_scanned_device would give for each QR in turn.
+        """
+        qrs = list(qrs)
+        colors = [self.check_len_color(qr) for qr in qrs]
+        in_db = self.filter_in_db({qr for qr, color in zip(qrs, colors) if color})
+        return self.scan_results(qrs, colors, in_db)
+
+    def scan_results(self, qrs: List[str], colors: List[Optional[str]], in_db: Set[str]) -> List[ScanResult]:
+        """Report every scan of a burst given its length colors and the QRs found in the DB."""
+        results = []
+        for qr, color in zip(qrs, colors):
+            error = message = None
+            if not color:
+                error = f"Error: Wrong qr length {len(qr)}"
+                self.send_error(error)
+            elif qr not in in_db:
+                error = "Not in DB"
+                self.send_error(error)
+            else:
+                message = f"hallelujah {qr}"
+                self.can_add_device(message)
+            results.append(ScanResult(qr, color, error, message))
+        return results
 
     @staticmethod
     def can_add_device(message: str):
@@ -42,3 +187,100 @@ class CheckQr:
     @staticmethod
     def send_error(error: str):
         return error
+
+
+class AsyncCheckQr(CheckQr):
+    """CheckQr with an awaitable DB check, so a slow lookup does not block other scans.
+
+    Every method that reaches the DB is a coroutine here; the closure chain of
+    scan_check_out_list cannot await and is not available.
+    """
+
+    async def check_in_db(self, qr):
+        raise ConnectionError
+
+    async def check_in_db_many(self, qrs: Iterable[str]) -> Set[str]:
+        """Return the QR codes that are in the DB; by default every QR is checked concurrently."""
+        qrs = list(qrs)
+        found = await asyncio.gather(*(self.check_in_db(qr) for qr in qrs))
+        return {qr for qr, in_db in zip(qrs, found) if in_db}
+
+    async def filter_in_db(self, qrs: Iterable[str]) -> Set[str]:
+        if self.cache is None:
+            return await self.check_in_db_many(qrs)
+        found, missing = self.cache.partition(qrs)
+        if missing:
+            found |= self.cache.set_many(missing, await self.check_in_db_many(missing))
+        return found
+
+    def scan_check_out_list(self, qr):
+        raise TypeError("AsyncCheckQr checks scans with 'await check_scanned_device(qr)'")
+
+    async def is_in_db(self, qr: str) -> bool:
+        if self.cache is None:
+            return await self.check_in_db(qr)
+        in_db = self.cache.get(qr)
+        if in_db is None:
+            in_db = self.cache.set(qr, bool(await self.check_in_db(qr)))
+        return in_db
+
+    async def check_scanned_device(self, qr: str) -> ScanResult:
+        color = self.check_len_color(qr)
+        if not color:
+            error = f"Error: Wrong qr length {len(qr)}"
+            self.send_error(error)
+            return ScanResult(qr, color, error, None)
+        if not await self.is_in_db(qr):
+            error = "Not in DB"
+            self.send_error(error)
+            return ScanResult(qr, color, error, None)
+        message = f"hallelujah {qr}"
+        self.can_add_device(message)
+        return ScanResult(qr, color, None, message)
+
+    async def check_scanned_devices(self, qrs: Iterable[str]) -> List[ScanResult]:
+        qrs = list(qrs)
+        colors = [self.check_len_color(qr) for qr in qrs]
+        in_db = await self.filter_in_db({qr for qr, color in zip(qrs, colors) if color})
+        return self.scan_results(qrs, colors, in_db)
+
+
+class ScanPipeline:
+    """Validates scans from many scanners through a bounded asyncio.Queue.
+
+    At most `concurrency` scans are checked at once and submit() waits while `max_pending`
+    scans are queued, which pushes back on the scanners. Each TimedScan records the time
+    from submit() to the end of the check.
+    """
+
+    def __init__(self, checker: AsyncCheckQr, concurrency: int = 8, max_pending: int = 100):
+        self.checker = checker
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.results: List[TimedScan] = []
+        self.workers: List[asyncio.Task] = []
+
+    async def submit(self, qr: str):
+        await self.queue.put((qr, time.perf_counter()))
+
+    async def worker(self):
+        while True:
+            qr, submitted = await self.queue.get()
+            try:
+                result = await self.checker.check_scanned_device(qr)
+                self.results.append(TimedScan(qr, result, time.perf_counter() - submitted))
+            except Exception as exception:
+                self.results.append(TimedScan(qr, None, time.perf_counter() - submitted, exception))
+            finally:
+                self.queue.task_done()
+
+    async def __aenter__(self):
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(self.concurrency)]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if exc_info[0] is None:
+            await self.queue.join()
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
@@ -0,0 +1,220 @@
+import os
+
+import pytest
+import numpy as np
+from test_task1 import (ERROR_MESSAGE_TABLE, SensorAnalyzer, SensorWindowCounter, big_record_columns,
+                        iter_big_records, merge_sensor_results, split_line_ranges)
+
+LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_2.log")
+
+
+@pytest.fixture
+def analyzer():
+    return SensorAnalyzer(log_file=LOG_FILE)
+
+
+@pytest.fixture
+def expected(analyzer):
+    return analyzer.process_sensor_logs()
+
+
+@pytest.mark.parametrize("chunk_size", [64, 4096, 16 * 1024 * 1024])
+def test_streaming_matches_line_parser(analyzer, expected, chunk_size):
+    assert analyzer.process_sensor_logs_streaming(chunk_size) == expected
+
+
+def test_big_record_columns_match_record_iterator():
+    with open(LOG_FILE, 'rb') as file:
+        data = file.read()
+    columns = big_record_columns(data)
+    assert columns is not None
+    assert list(zip(*[column.tolist() for column in columns])) == [fields[1:] for fields in iter_big_records(data)]
+
+
+def test_streaming_falls_back_on_unusual_big_lines(tmp_path):
+    fields = "61;C79AE1;1;66;42;9170;1;2;28;5;0;0;581;1;-8595;1;02;"
+    log_file = tmp_path / "app.log"
+    log_file.write_text("\n".join([
+        f"2021-11-15 13:36:11,424 - DEBUG - > 'BIG;{fields}'",
+        f"2021-11-15 13:36:11,425 - DEBUG -  >   'BIG;{fields}'  ",
+        f"2021-11-15 13:36:11,426 - DEBUG - a > b > 'BIG;{fields}'",
+        f"2021-11-15 13:36:11,427 - DEBUG - > 'BIGX;{fields.replace('C79AE1', 'AAAAAA')}'",
+    ]) + "\n")
+    analyzer = SensorAnalyzer(str(log_file))
+    assert big_record_columns(log_file.read_bytes()) is None
+    assert analyzer.process_sensor_logs_streaming() == analyzer.process_sensor_logs()
+    assert analyzer.process_sensor_logs_streaming()[0] == {'c79ae1': 2, 'aaaaaa': 1}
+
+
+@pytest.mark.parametrize("chunk_size", [64, 1024 * 1024])
+def test_mmap_matches_line_parser(analyzer, expected, chunk_size):
+    assert analyzer.process_sensor_logs_mmap(chunk_size) == expected
+
+
+def test_mmap_empty_file(tmp_path):
+    log_file = tmp_path / "empty.log"
+    log_file.write_bytes(b"")
+    assert SensorAnalyzer(str(log_file)).process_sensor_logs_mmap() == ({}, {}, {})
+
+
+@pytest.mark.parametrize("error_flags", ["000", "100", "010", "001", "110", "101", "011", "111"])
+def test_error_message_table_matches_get_error_message(analyzer, error_flags):
+    code = int(error_flags[::-1], 2)
+    assert ERROR_MESSAGE_TABLE[code] == analyzer.get_error_message(error_flags)
+
+
+def test_batch_error_flags_match_scalar(analyzer):
+    sp1 = ["6160", "4908", "9124", "7", "", "123456789"]
+    sp2 = ["141", "829", "898", "9", "88", "0"]
+    bitmasks, codes = analyzer.calculate_error_flags_batch(sp1, sp2)
+    messages = analyzer.get_error_messages_batch(codes)
+    for index, (value1, value2) in enumerate(zip(sp1, sp2)):
+        error_flags = analyzer.calculate_error_flags(value1, value2)
+        assert bitmasks[index] == int(error_flags[::-1], 2)
+        assert messages[index] == analyzer.get_error_message(error_flags)
+
+
+def test_batch_error_flags_reject_non_digits(analyzer):
+    with pytest.raises(ValueError):
+        analyzer.calculate_error_flags_batch(["12a4"], ["141"])
+
+
+@pytest.mark.parametrize("parts", [1, 3, 8])
+def test_line_ranges_cover_file_on_line_boundaries(parts):
+    ranges = split_line_ranges(LOG_FILE, parts)
+    assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(LOG_FILE)
+    with open(LOG_FILE, 'rb') as file:
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            file.seek(start - 1)
+            assert file.read(1) == b"\n"
+
+
+def test_merge_keeps_last_error_message():
+    first = ({'a1': 2, 'b2': 1}, {'b2': {'count': 1, 'error_message': 'Battery device error'}})
+    second = ({'a1': 1}, {'b2': {'count': 2, 'error_message': 'Temperature device error'}})
+    valid_sensors, sensor_errors = merge_sensor_results([first, second])
+    assert valid_sensors == {'a1': 3, 'b2': 1}
+    assert sensor_errors == {'b2': {'count': 3, 'error_message': 'Temperature device error'}}
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_parallel_matches_line_parser(analyzer, expected, workers):
+    assert analyzer.process_sensor_logs_parallel(workers=workers, chunk_size=4096) == expected
+
+
+def split_sample_log(parts):
+    with open(LOG_FILE, 'rb') as file:
+        data = file.read()
+    size = len(data) // parts
+    return [data[index * size:(index + 1) * size] for index in range(parts - 1)] + [data[(parts - 1) * size:]]
+
+
+def test_follow_reads_only_appended_lines(tmp_path, expected):
+    log_file = tmp_path / "app.log"
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    analyzer = SensorAnalyzer(str(log_file))
+    log_file.write_bytes(b"")
+    for piece in split_sample_log(4):
+        with open(log_file, 'ab') as file:
+            file.write(piece)
+        result = analyzer.process_sensor_logs_follow(checkpoint_file)
+    assert result == expected
+
+
+def test_follow_handles_rotation(tmp_path, expected):
+    log_file = tmp_path / "app.log"
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    analyzer = SensorAnalyzer(str(log_file))
+    first, second, third = split_sample_log(3)
+    log_file.write_bytes(first)
+    analyzer.process_sensor_logs_follow(checkpoint_file)
+    with open(log_file, 'ab') as file:
+        file.write(second)
+    os.replace(log_file, tmp_path / "app.log.1")
+    log_file.write_bytes(third)
+    assert analyzer.process_sensor_logs_follow(checkpoint_file) == expected
+
+
+def test_follow_restarts_after_truncation(tmp_path):
+    log_file = tmp_path / "app.log"
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    analyzer = SensorAnalyzer(str(log_file))
+    record = b"2021-11-15 13:36:11,424 - DEBUG - > 'BIG;61;C79AE1;1;66;42;9170;1;2;28;5;0;0;581;1;-8595;1;02;'\n"
+    log_file.write_bytes(record * 3)
+    analyzer.process_sensor_logs_follow(checkpoint_file)
+    log_file.write_bytes(record)
+    assert analyzer.process_sensor_logs_follow(checkpoint_file)[0] == {'c79ae1': 4}
+
+
+def test_follow_ignores_checkpoint_of_another_log(tmp_path, expected):
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    other_log = tmp_path / "other.log"
+    other_log.write_bytes(b"2021-11-15 13:36:11,424 - DEBUG - > "
+                          b"'BIG;61;AAAAAA;1;66;42;9170;1;2;28;5;0;0;581;1;-8595;1;02;'\n")
+    SensorAnalyzer(str(other_log)).process_sensor_logs_follow(checkpoint_file)
+    assert SensorAnalyzer(LOG_FILE).process_sensor_logs_follow(checkpoint_file) == expected
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_export_big_records(tmp_path, analyzer, expected, file_format):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    output_file = str(tmp_path / f"records.{file_format}")
+    rows = analyzer.export_big_records(output_file, file_format=file_format, batch_size=1000)
+    if file_format == "parquet":
+        table = pq.read_table(output_file)
+    else:
+        table = pa.ipc.open_stream(output_file).read_all()
+
+    records = table.to_pylist()
+    assert rows == len(records) == 12575
+    assert records[0]['timestamp'].isoformat() == "2021-11-15T13:36:11.424000"
+    assert records[0]['level'] == "DEBUG" and records[0]['sensor_id'] == "c79ae1"
+    last_errors = {record['sensor_id']: ERROR_MESSAGE_TABLE[record['error_code']]
+                   for record in records if record['state'] == "DD"}
+    assert last_errors == {sensor_id: error['error_message'] for sensor_id, error in expected[1].items()}
+
+
+def test_aggregate_by_window(tmp_path):
+    ok = "'BIG;61;C79AE1;1;66;42;9170;1;2;28;5;0;0;581;1;-8595;1;02;'"
+    dd = "'BIG;77;C79AE1;1;66;42;6160;1;2;46;5;0;0;141;1;-3474;1;DD;'"
+    log_file = tmp_path / "app.log"
+    log_file.write_text("\n".join([
+        f"2021-11-15 13:36:11,424 - DEBUG - > {ok}",
+        f"2021-11-15 13:59:59,999 - DEBUG - > {dd}",
+        "2021-11-15 14:00:00,000 - DEBUG - Detect c79ae1",
+        f"2021-11-15 14:00:00,001 - DEBUG - > {ok}",
+        f"2021-11-15 14:10:00,001 - DEBUG - > {ok}",
+        f"not a timestamp - DEBUG - > {ok}",
+    ]) + "\n")
+    columns = SensorAnalyzer(str(log_file)).aggregate_by_window('hour').as_arrays()
+    assert list(columns['sensor_id']) == ['c79ae1', 'c79ae1']
+    assert [str(window) for window in columns['window_start']] == ['2021-11-15T13', '2021-11-15T14']
+    assert list(columns['ok']) == [1, 2] and list(columns['dd']) == [1, 0]
+    assert list(columns['error_rate']) == [0.5, 0.0]
+
+
+def test_window_counter_incremental_merges_match_single_merge():
+    rng = np.random.default_rng(0)
+    timestamps = np.datetime64('2021-11-15T13:00') + rng.integers(0, 600, 5000).astype('timedelta64[m]')
+    sensor_ids = [f"s{i}" for i in rng.integers(0, 7, 5000)]
+    states = [b'DD' if dd else b'02' for dd in rng.random(5000) < 0.2]
+    once, merged = SensorWindowCounter('hour'), SensorWindowCounter('hour', merge_every=1)
+    once.add(timestamps, sensor_ids, states)
+    for start in range(0, 5000, 37):
+        merged.add(timestamps[start:start + 37], sensor_ids[start:start + 37], states[start:start + 37])
+    expected, actual = once.as_arrays(), merged.as_arrays()
+    assert np.all(np.diff(merged.keys) > 0)
+    for name in expected:
+        assert np.array_equal(actual[name], expected[name])
+
+
+def test_aggregate_by_window_totals_match_line_parser(analyzer):
+    columns = analyzer.aggregate_by_window('minute', chunk_size=4096).as_arrays()
+    totals = {}
+    for sensor_id, count in zip(columns['sensor_id'], columns['ok']):
+        totals[sensor_id] = totals.get(sensor_id, 0) + int(count)
+    valid_sensors, _, _ = analyzer.process_sensor_logs()
+    assert {k: v for k, v in totals.items() if k in valid_sensors} == valid_sensors
+    assert int(columns['dd'].sum()) == 11
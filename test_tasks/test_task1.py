@@ -1,4 +1,307 @@
-from typing import Tuple, Optional, Dict
+import json
+import mmap
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, Optional, Dict, BinaryIO, Iterator, Iterable, List
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+# Bytes of the memory map scanned at once; the scan's working arrays are a few times this
+MMAP_SCAN_SIZE = 1024 * 1024
+DEFAULT_EXPORT_BATCH_SIZE = 500_000
+# Suffix logging.handlers.RotatingFileHandler gives the previous log file
+ROTATED_LOG_SUFFIX = ".1"
+# Time window name -> NumPy datetime64 unit used for bucketing
+WINDOW_UNITS = {'minute': 'm', 'hour': 'h', 'day': 'D'}
+
+ERROR_MESSAGES = {
+    1: "Battery device error",
+    2: "Temperature device error",
+    3: "Threshold central error",
+}
+UNKNOWN_ERROR_MESSAGE = "Unknown device error"
+
+# Usual start of a BIG record: the line's first '>', a space, a quote and the BIG field
+BIG_MARKER = b"> 'BIG;"
+# Bytes before BIG that must contain the line start, and after BIG that must hold fields 1..17
+PREFIX_WINDOW = 64
+RECORD_WINDOW = 96
+
+# Message for every combination of the first three error flags; bit i of the code is flag i + 1.
+ERROR_MESSAGE_TABLE = np.array(
+    [", ".join(ERROR_MESSAGES[flag] for flag in ERROR_MESSAGES if code >> (flag - 1) & 1) or UNKNOWN_ERROR_MESSAGE
+     for code in range(8)],
+    dtype=object,
+)
+
+
+def iter_line_chunks(file: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     size: Optional[int] = None) -> Iterator[bytes]:
+    """Read a binary file in large chunks, each ending on a newline boundary.
+
+    If size is given, at most size bytes are read from the current position.
+    """
+    tail = b""
+    while size is None or size > 0:
+        block = file.read(chunk_size if size is None else min(chunk_size, size))
+        if not block:
+            break
+        if size is not None:
+            size -= len(block)
+        cut = block.rfind(b"\n")
+        if cut == -1:
+            tail += block
+            continue
+        yield tail + memoryview(block)[:cut + 1]
+        tail = block[cut + 1:]
+    if tail:
+        yield tail
+
+
+def iter_big_lines(buffer, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, List[bytes]]]:
+    """Yield (line prefix, row fields) of every BIG record in buffer[start:end].
+
+    Only lines containing b"BIG" are sliced out of the buffer; the row is picked the same way
+    as in process_sensor_logs, i.e. the text between the first and second '>' of the line,
+    and the prefix is the text before the first '>' (timestamp and log level).
+    """
+    end = len(buffer) if end is None else end
+    find = buffer.find
+    pos = start
+    while True:
+        index = find(b"BIG", pos, end)
+        if index == -1:
+            return
+        line_start = buffer.rfind(b"\n", start, index) + 1 or start
+        line_end = find(b"\n", index, end)
+        if line_end == -1:
+            line_end = end
+        parts = buffer[line_start:line_end].split(b">", 2)
+        if len(parts) > 1 and b"BIG" in parts[1]:
+            yield parts[0], parts[1].strip().strip(b"'").strip().split(b';')
+        pos = line_end
+
+
+def iter_big_records(buffer, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, ...]]:
+    """Yield raw (handler, sensor id, S_P_1, S_P_2, state) fields of every BIG record in buffer[start:end]."""
+    for _, fields in iter_big_lines(buffer, start, end):
+        yield fields[0], fields[2], fields[6], fields[13], fields[17]
+
+
+def _positions(data: np.ndarray, pattern: bytes) -> np.ndarray:
+    """Offsets of every occurrence of pattern in a uint8 array."""
+    found = np.flatnonzero(data[:len(data) - len(pattern) + 1] == pattern[0])
+    for offset, char in enumerate(pattern[1:], start=1):
+        found = found[data[found + offset] == char]
+    return found
+
+
+def big_record_columns(buffer, start: int = 0, end: Optional[int] = None) -> Optional[Tuple[np.ndarray, ...]]:
+    """(sensor id, S_P_1, S_P_2, state) bytes arrays of every BIG record in buffer[start:end], in order.
+
+    start must be at the beginning of a line. Instead of a Python step per record, BIG is
+    found with one numpy pass and every record is checked and cut from short windows before
+    and after it. That only works while every BIG line has the usual
+    "... > 'BIG;f1;...;f17;...'" form; if any line does not (BIG elsewhere, another '>' or a
+    prefix longer than PREFIX_WINDOW before the marker, a quote, '>' or line break among the
+    first 18 fields, fields longer than RECORD_WINDOW) None is returned and the caller falls
+    back to iter_big_records.
+    """
+    end = len(buffer) if end is None else end
+    data = np.frombuffer(buffer, dtype=np.uint8, count=end - start, offset=start)
+    big = _positions(data, b"BIG")
+    empty = np.empty(0, dtype='S1')
+    if not len(big):
+        return empty, empty, empty, empty
+
+    # Padded with '\n' on the left (the buffer starts a line) and zeros on the right
+    padded = np.zeros(len(data) + 2 * RECORD_WINDOW, dtype=np.uint8)
+    padded[:RECORD_WINDOW] = ord("\n")
+    padded[RECORD_WINDOW:RECORD_WINDOW + len(data)] = data
+    # The bytes before BIG in reverse order, and the bytes after "BIG"
+    reverse = np.lib.stride_tricks.sliding_window_view(padded[::-1], PREFIX_WINDOW)[
+        len(data) + RECORD_WINDOW - big]
+    after = np.lib.stride_tricks.sliding_window_view(padded, RECORD_WINDOW)[big + RECORD_WINDOW + 3]
+    if np.any(reverse[:, :3] != np.frombuffer(BIG_MARKER[2::-1], dtype=np.uint8)) or np.any(after[:, 0] != ord(";")):
+        return None
+
+    # The marker must be the line's first '>': no '>' between it and the previous '\n'
+    rows = np.arange(len(big))
+    nearest_break = np.argmax(reverse == ord("\n"), axis=1)
+    nearest_arrow = np.argmax(reverse[:, 3:] == ord(">"), axis=1) + 3
+    if np.any(reverse[rows, nearest_break] != ord("\n")) or np.any(
+            (reverse[rows, nearest_arrow] == ord(">")) & (nearest_arrow < nearest_break)):
+        return None
+
+    # Fields 1..17 lie between the next 18 semicolons, without quotes, '>' or line breaks
+    semicolons = np.flatnonzero(after == ord(";"))
+    row_starts = np.searchsorted(semicolons, np.arange(len(big) + 1) * RECORD_WINDOW)
+    if np.any(np.diff(row_starts) < 18):
+        return None
+    bounds = semicolons[row_starts[:-1, None] + np.arange(18)] - rows[:, None] * RECORD_WINDOW
+    forbidden = (after == ord("\n")) | (after == ord(">")) | (after == ord("'")) | (after == 0)
+    first_forbidden = np.argmax(forbidden, axis=1)
+    if np.any(forbidden[rows, first_forbidden] & (first_forbidden < bounds[:, 17])):
+        return None
+
+    fields = []
+    for field in (2, 6, 13, 17):
+        field_start, field_end = bounds[:, field - 1] + 1, bounds[:, field]
+        lengths = (field_end - field_start)[:, None]
+        width = int(lengths.max()) or 1
+        chars = after[rows[:, None], np.minimum(field_start[:, None] + np.arange(width), RECORD_WINDOW - 1)]
+        chars = chars * (np.arange(width) < lengths)
+        fields.append(np.ascontiguousarray(chars, dtype=np.uint8).view(f'S{width}').ravel())
+    return tuple(fields)
+
+
+def parse_line_prefix(prefix: bytes) -> Tuple[str, str]:
+    """Split a '2021-11-15 13:36:11,424 - DEBUG - ' line prefix into an ISO timestamp and a log level."""
+    parts = prefix.split(b" - ")
+    timestamp = parts[0].strip().replace(b",", b".").decode()
+    level = parts[1].strip().decode() if len(parts) > 1 else ""
+    return timestamp, level
+
+
+def parse_timestamps(values: List[str]) -> np.ndarray:
+    """Convert ISO timestamps to datetime64[ms], unparsable ones become NaT."""
+    try:
+        return np.array(values, dtype='datetime64[ms]')
+    except ValueError:
+        parsed = np.empty(len(values), dtype='datetime64[ms]')
+        for index, value in enumerate(values):
+            try:
+                parsed[index] = np.datetime64(value, 'ms')
+            except ValueError:
+                parsed[index] = np.datetime64('NaT')
+        return parsed
+
+
+def parse_int_column(values: List[bytes]) -> List[Optional[int]]:
+    """Parse decimal fields, values that are not integers become None."""
+    try:
+        return np.array(values, dtype=np.bytes_).astype(np.int64)
+    except ValueError:
+        return [int(value) if value.strip().lstrip(b"-").isdigit() else None for value in values]
+
+
+def split_line_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into at most `parts` (start, end) byte ranges that begin and end on line boundaries."""
+    file_size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as file:
+        for index in range(1, parts):
+            offset = file_size * index // parts
+            if offset <= bounds[-1]:
+                continue
+            file.seek(offset - 1)
+            file.readline()
+            if file.tell() >= file_size:
+                break
+            if file.tell() > bounds[-1]:
+                bounds.append(file.tell())
+    bounds.append(file_size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def merge_sensor_results(partials: Iterable[Tuple[Dict[str, int], Dict[str, Dict[str, Optional[str]]]]]
+                         ) -> Tuple[Dict[str, int], Dict[str, Dict[str, Optional[str]]]]:
+    """Merge unfiltered (valid_sensors, sensor_errors) pairs given in file order.
+
+    Counts are summed and the error message of the latest part wins, as in a single pass.
+    """
+    valid_sensors: Dict[str, int] = {}
+    sensor_errors: Dict[str, Dict[str, Optional[str]]] = {}
+    for part_valid, part_errors in partials:
+        for sensor_id, count in part_valid.items():
+            valid_sensors[sensor_id] = valid_sensors.get(sensor_id, 0) + count
+        for sensor_id, error in part_errors.items():
+            if sensor_id in sensor_errors:
+                sensor_errors[sensor_id]['count'] += error['count']
+                sensor_errors[sensor_id]['error_message'] = error['error_message']
+            else:
+                sensor_errors[sensor_id] = dict(error)
+    return valid_sensors, sensor_errors
+
+
+class SensorWindowCounter:
+    """OK/DD counts per sensor and time window.
+
+    Counters live in sorted parallel NumPy arrays keyed by (window << 32 | sensor index), so
+    memory grows with the number of active (sensor, window) pairs only, not with nested dicts.
+    New records are buffered and merged in bulk.
+    """
+
+    def __init__(self, window: str = 'hour', merge_every: int = 1_000_000):
+        if window not in WINDOW_UNITS:
+            raise ValueError(f"Unknown window {window}, expected one of {', '.join(WINDOW_UNITS)}")
+        self.window = window
+        self.unit = WINDOW_UNITS[window]
+        self.merge_every = merge_every
+        self.sensor_index: Dict[str, int] = {}
+        self.sensor_ids: List[str] = []
+        self.keys = np.empty(0, dtype=np.int64)
+        self.ok_counts = np.empty(0, dtype=np.uint32)
+        self.dd_counts = np.empty(0, dtype=np.uint32)
+        self.pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.pending_size = 0
+
+    def add(self, timestamps: np.ndarray, sensor_ids: List[str], states: List[bytes]) -> None:
+        """Count records given as datetime64 timestamps, lower-case sensor ids and raw states."""
+        index = self.sensor_index
+        sensors = np.fromiter(
+            (index[sensor_id] if sensor_id in index else self._new_sensor(sensor_id) for sensor_id in sensor_ids),
+            dtype=np.int64, count=len(sensor_ids))
+        is_dd = np.array([state == b'DD' for state in states], dtype=bool)
+        counted = ~np.isnat(timestamps) & (is_dd | np.array([state == b'02' for state in states], dtype=bool))
+        windows = timestamps[counted].astype(f'datetime64[{self.unit}]').astype(np.int64)
+        self.pending.append(((windows << 32) | sensors[counted], is_dd[counted]))
+        self.pending_size += int(counted.sum())
+        if self.pending_size >= self.merge_every:
+            self.merge()
+
+    def _new_sensor(self, sensor_id: str) -> int:
+        self.sensor_index[sensor_id] = len(self.sensor_ids)
+        self.sensor_ids.append(sensor_id)
+        return self.sensor_index[sensor_id]
+
+    def merge(self) -> None:
+        """Fold buffered records into the sorted counter arrays."""
+        if not self.pending:
+            return
+        new_keys = np.concatenate([keys for keys, _ in self.pending])
+        new_dd = np.concatenate([is_dd for _, is_dd in self.pending])
+        self.pending, self.pending_size = [], 0
+
+        # Only the new batch is reduced; the history stays sorted and unique
+        batch_keys, inverse = np.unique(new_keys, return_inverse=True)
+        batch_dd = np.bincount(inverse, weights=new_dd, minlength=len(batch_keys)).astype(np.uint32)
+        batch_ok = np.bincount(inverse, minlength=len(batch_keys)).astype(np.uint32) - batch_dd
+
+        positions = np.searchsorted(self.keys, batch_keys)
+        hit = positions < len(self.keys)
+        hit[hit] = self.keys[positions[hit]] == batch_keys[hit]
+        self.ok_counts[positions[hit]] += batch_ok[hit]
+        self.dd_counts[positions[hit]] += batch_dd[hit]
+
+        miss = ~hit
+        self.keys = np.insert(self.keys, positions[miss], batch_keys[miss])
+        self.ok_counts = np.insert(self.ok_counts, positions[miss], batch_ok[miss])
+        self.dd_counts = np.insert(self.dd_counts, positions[miss], batch_dd[miss])
+
+    def as_arrays(self) -> Dict[str, np.ndarray]:
+        """Counters as columns sorted by window start, then by first appearance of the sensor."""
+        self.merge()
+        total = self.ok_counts.astype(np.float64) + self.dd_counts
+        return {
+            'sensor_id': np.array(self.sensor_ids, dtype=object)[self.keys & 0xFFFFFFFF],
+            'window_start': (self.keys >> 32).astype(f'datetime64[{self.unit}]'),
+            'ok': self.ok_counts,
+            'dd': self.dd_counts,
+            'error_rate': np.divide(self.dd_counts, total, out=np.zeros_like(total), where=total > 0),
+        }
 
 
 class SensorAnalyzer:
@@ -17,13 +320,49 @@ class SensorAnalyzer:
         return ''.join(flag[4] for flag in binary_flags)
 
     def get_error_message(self, error_flags: str) -> str:
-        error_messages = {
-            1: "Battery device error",
-            2: "Temperature device error",
-            3: "Threshold central error",
-        }
-        errors = [error_messages.get(index, "Unknown device error") for index, flag in enumerate(error_flags[:3], start=1) if flag == '1']
-        return ", ".join(errors) if any(errors) else "Unknown device error"
+        errors = [ERROR_MESSAGES.get(index, UNKNOWN_ERROR_MESSAGE) for index, flag in enumerate(error_flags[:3], start=1) if flag == '1']
+        return ", ".join(errors) if any(errors) else UNKNOWN_ERROR_MESSAGE
+
+    def calculate_error_flags_batch(self, sp1_values, sp2_values) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorised calculate_error_flags for arrays of S_P_1 and S_P_2 decimal digit strings.
+
+        Returns (bitmasks, codes). Bit i of a bitmask is the (i + 1)-th flag calculate_error_flags
+        would return, the code keeps the three flags get_error_message reads and indexes
+        ERROR_MESSAGE_TABLE.
+        """
+        sp1 = np.ascontiguousarray(np.asarray(sp1_values, dtype=np.bytes_).ravel())
+        sp2 = np.ascontiguousarray(np.asarray(sp2_values, dtype=np.bytes_).ravel())
+        if len(sp1) != len(sp2):
+            raise ValueError("S_P_1 and S_P_2 arrays must have the same length")
+        rows = len(sp1)
+        sp1_chars = sp1.view(np.uint8).reshape(rows, sp1.itemsize)
+        sp2_chars = sp2.view(np.uint8).reshape(rows, sp2.itemsize)
+
+        # combined = sp1[:-1] + sp2, laid out as one row of characters per record
+        sp1_length = np.maximum(np.char.str_len(sp1) - 1, 0)[:, None]
+        length = sp1_length + np.char.str_len(sp2)[:, None]
+        width = sp1.itemsize + sp2.itemsize
+        width += width % 2
+        columns = np.arange(width)
+        combined = np.where(
+            columns < sp1_length,
+            sp1_chars[:, np.minimum(columns, sp1.itemsize - 1)],
+            np.take_along_axis(sp2_chars, np.clip(columns - sp1_length, 0, sp2.itemsize - 1), axis=1),
+        )
+        present = columns < length
+        digits = combined.astype(np.int16) - ord('0')
+        if np.any(present & ((digits < 0) | (digits > 9))):
+            raise ValueError("S_P_1 and S_P_2 must be decimal digit strings")
+
+        # int(combined[i:i+2]) for every pair, a trailing single digit stays as is
+        values = np.where(present[:, 1::2], digits[:, 0::2] * 10 + digits[:, 1::2], digits[:, 0::2])
+        flags = ((values >> 3) & 1) * present[:, 0::2]
+        bitmasks = (flags.astype(np.uint64) << np.arange(flags.shape[1], dtype=np.uint64)).sum(axis=1, dtype=np.uint64)
+        return bitmasks, (bitmasks & np.uint64(0b111)).astype(np.uint8)
+
+    def get_error_messages_batch(self, codes) -> np.ndarray:
+        """Error messages for the codes returned by calculate_error_flags_batch."""
+        return ERROR_MESSAGE_TABLE[np.asarray(codes, dtype=np.intp)]
 
     def process_sensor_logs(self) -> Tuple[Dict[str, int], Dict[str, Dict[str, Optional[str]]]]:
         """Process file to find error and success messages and count them."""
@@ -53,6 +392,286 @@ class SensorAnalyzer:
         valid_sensors = {k: v for k, v in valid_sensors.items() if k not in sensor_errors}
         return valid_sensors, sensor_errors, sensor_errors
 
+    def scan_big_records(self, buffer, valid_sensors: Dict[str, int], sensor_errors: Dict[str, Dict[str, Optional[str]]],
+                         start: int = 0, end: Optional[int] = None) -> None:
+        """Count BIG records of a raw bytes buffer into valid_sensors and sensor_errors.
+
+        OK records are counted per distinct raw sensor id (with numpy when big_record_columns
+        can cut the buffer), so only DD records are visited one by one; their error messages
+        are decoded in one vectorised pass.
+        """
+        columns = big_record_columns(buffer, start, end)
+        if columns is None:
+            records = [fields[1:] for fields in iter_big_records(buffer, start, end)]
+            ok_counts = Counter(sensor_id for sensor_id, _, _, state in records if state == b'02')
+            failed_records = [record[:3] for record in records if record[3] == b'DD']
+        else:
+            sensor_ids, sp1_values, sp2_values, states = columns
+            ok_ids, counts = np.unique(sensor_ids[states == b'02'], return_counts=True)
+            ok_counts = dict(zip(ok_ids.tolist(), counts.tolist()))
+            failed_index = np.flatnonzero(states == b'DD')
+            failed_records = zip(sensor_ids[failed_index].tolist(), sp1_values[failed_index].tolist(),
+                                 sp2_values[failed_index].tolist())
+
+        for sensor_id, count in ok_counts.items():  # Sensor OK
+            sensor_id = sensor_id.decode().lower()
+            valid_sensors[sensor_id] = valid_sensors.get(sensor_id, 0) + count
+        failed = []
+        for sensor_id, sp1, sp2 in failed_records:  # Sensor not OK
+            sensor_id = sensor_id.decode().lower()
+            error = sensor_errors.get(sensor_id)
+            if error is None:
+                error = sensor_errors[sensor_id] = {'count': 0}
+            error['count'] += 1
+            failed.append((error, sp1, sp2))
+        if failed:
+            self._set_error_messages(failed)
+
+    def _set_error_messages(self, failed: List[Tuple[Dict[str, Optional[str]], bytes, bytes]]) -> None:
+        """Assign error messages in record order, so the last DD record of a sensor wins."""
+        try:
+            _, codes = self.calculate_error_flags_batch([sp1 for _, sp1, _ in failed], [sp2 for _, _, sp2 in failed])
+            messages = self.get_error_messages_batch(codes)
+        except ValueError:
+            # Not plain digits (e.g. a signed value), decode one by one like process_sensor_logs
+            messages = [self.get_error_message(self.calculate_error_flags(sp1.decode(), sp2.decode()))
+                        for _, sp1, sp2 in failed]
+        for (error, _, _), message in zip(failed, messages):
+            error['error_message'] = message
+
+    def process_sensor_logs_streaming(self, chunk_size: int = DEFAULT_CHUNK_SIZE
+                                      ) -> Tuple[Dict[str, int], Dict[str, Dict[str, Optional[str]]]]:
+        """Same result as process_sensor_logs, but scans the file in large binary chunks."""
+        valid_sensors: Dict[str, int] = {}
+        sensor_errors: Dict[str, Dict[str, Optional[str]]] = {}
+
+        with open(self.log_file, 'rb') as file:
+            for chunk in iter_line_chunks(file, chunk_size):
+                self.scan_big_records(chunk, valid_sensors, sensor_errors)
+
+        valid_sensors = {k: v for k, v in valid_sensors.items() if k not in sensor_errors}
+        return valid_sensors, sensor_errors, sensor_errors
+
+    def process_sensor_logs_mmap(self, chunk_size: int = MMAP_SCAN_SIZE
+                                 ) -> Tuple[Dict[str, int], Dict[str, Dict[str, Optional[str]]]]:
+        """Same result as process_sensor_logs, scanning a read-only memory map of the file.
+
+        The mapping is scanned in line-aligned slices of about chunk_size bytes, so the
+        scan's working arrays stay bounded however large the file is.
+        """
+        valid_sensors: Dict[str, int] = {}
+        sensor_errors: Dict[str, Dict[str, Optional[str]]] = {}
+
+        with open(self.log_file, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    start = 0
+                    while start < size:
+                        end = mapped.find(b"\n", min(start + chunk_size, size) - 1) + 1 or size
+                        self.scan_big_records(mapped, valid_sensors, sensor_errors, start, end)
+                        start = end
+
+        valid_sensors = {k: v for k, v in valid_sensors.items() if k not in sensor_errors}
+        return valid_sensors, sensor_errors, sensor_errors
+
+    def process_log_range(self, start: int, end: int, chunk_size: int = DEFAULT_CHUNK_SIZE
+                          ) -> Tuple[Dict[str, int], Dict[str, Dict[str, Optional[str]]]]:
+        """Count BIG records between two line-aligned byte offsets, without dropping errored sensors."""
+        valid_sensors: Dict[str, int] = {}
+        sensor_errors: Dict[str, Dict[str, Optional[str]]] = {}
+
+        with open(self.log_file, 'rb') as file:
+            file.seek(start)
+            for chunk in iter_line_chunks(file, chunk_size, size=end - start):
+                self.scan_big_records(chunk, valid_sensors, sensor_errors)
+        return valid_sensors, sensor_errors
+
+    def process_sensor_logs_parallel(self, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+                                     ) -> Tuple[Dict[str, int], Dict[str, Dict[str, Optional[str]]]]:
+        """Same result as process_sensor_logs, with line-aligned byte ranges processed in a process pool."""
+        workers = workers or os.cpu_count() or 1
+        ranges = split_line_ranges(self.log_file, workers)
+
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(ranges)))) as executor:
+            partials = executor.map(self.process_log_range,
+                                    [start for start, _ in ranges],
+                                    [end for _, end in ranges],
+                                    [chunk_size] * len(ranges))
+            valid_sensors, sensor_errors = merge_sensor_results(partials)
+
+        valid_sensors = {k: v for k, v in valid_sensors.items() if k not in sensor_errors}
+        return valid_sensors, sensor_errors, sensor_errors
+
+    def error_flags_column(self, sp1_values: List[bytes], sp2_values: List[bytes]):
+        """Flag bitmasks and error codes for export, None where S_P_1/S_P_2 cannot be decoded."""
+        try:
+            return self.calculate_error_flags_batch(sp1_values, sp2_values)
+        except ValueError:
+            bitmasks: List[Optional[int]] = []
+            for sp1, sp2 in zip(sp1_values, sp2_values):
+                try:
+                    error_flags = self.calculate_error_flags(sp1.decode(), sp2.decode())
+                    bitmasks.append(int(error_flags[::-1] or "0", 2))
+                except ValueError:
+                    bitmasks.append(None)
+            return bitmasks, [None if bitmask is None else bitmask & 0b111 for bitmask in bitmasks]
+
+    def big_records_table(self, records: List[Tuple[bytes, ...]]):
+        """Build a typed Arrow table from (line prefix, handler, sensor id, S_P_1, S_P_2, state) records."""
+        import pyarrow as pa
+
+        prefixes, handlers, sensor_ids, sp1_values, sp2_values, states = zip(*records)
+        timestamps, levels = zip(*map(parse_line_prefix, prefixes))
+        bitmasks, codes = self.error_flags_column(sp1_values, sp2_values)
+        return pa.table({
+            'timestamp': pa.array(parse_timestamps(list(timestamps)), pa.timestamp('ms')),
+            'level': pa.array(levels, pa.string()).dictionary_encode(),
+            'handler': pa.array([handler.decode() for handler in handlers], pa.string()).dictionary_encode(),
+            'sensor_id': pa.array([sensor_id.decode().lower() for sensor_id in sensor_ids], pa.string()),
+            'sp1': pa.array(parse_int_column(list(sp1_values)), pa.int64()),
+            'sp2': pa.array(parse_int_column(list(sp2_values)), pa.int64()),
+            'state': pa.array([state.decode() for state in states], pa.string()).dictionary_encode(),
+            'error_flags': pa.array(bitmasks, pa.uint64()),
+            'error_code': pa.array(codes, pa.uint8()),
+        })
+
+    def export_big_records(self, output_file: str, file_format: str = 'parquet',
+                           batch_size: int = DEFAULT_EXPORT_BATCH_SIZE, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Write every parsed BIG record to a Parquet file or an Arrow IPC stream and return the number of rows.
+
+        Records are written in batches of batch_size rows, so memory is bounded by one batch
+        and one read chunk whatever the size of the log. Bit i of error_flags is flag i + 1 of
+        calculate_error_flags and error_code indexes ERROR_MESSAGE_TABLE.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        dictionary = pa.dictionary(pa.int32(), pa.string())
+        schema = pa.schema([
+            ('timestamp', pa.timestamp('ms')),
+            ('level', dictionary),
+            ('handler', dictionary),
+            ('sensor_id', pa.string()),
+            ('sp1', pa.int64()),
+            ('sp2', pa.int64()),
+            ('state', dictionary),
+            ('error_flags', pa.uint64()),
+            ('error_code', pa.uint8()),
+        ])
+        if file_format == 'parquet':
+            writer = pq.ParquetWriter(output_file, schema)
+        elif file_format == 'arrow':
+            # the stream format allows a different string dictionary in every batch
+            writer = pa.ipc.new_stream(output_file, schema)
+        else:
+            raise ValueError(f"Unknown export format: {file_format}")
+
+        rows = 0
+        records: List[Tuple[bytes, ...]] = []
+        with writer, open(self.log_file, 'rb') as file:
+            for chunk in iter_line_chunks(file, chunk_size):
+                for prefix, fields in iter_big_lines(chunk):
+                    records.append((prefix, fields[0], fields[2], fields[6], fields[13], fields[17]))
+                    if len(records) >= batch_size:
+                        writer.write_table(self.big_records_table(records).cast(schema))
+                        rows += len(records)
+                        records = []
+            if records:
+                writer.write_table(self.big_records_table(records).cast(schema))
+                rows += len(records)
+        return rows
+
+    def aggregate_by_window(self, window: str = 'hour', chunk_size: int = DEFAULT_CHUNK_SIZE) -> SensorWindowCounter:
+        """Count OK and DD records per sensor per minute, hour or day of the line timestamps.
+
+        Records without a parsable timestamp are skipped.
+        """
+        counter = SensorWindowCounter(window)
+        with open(self.log_file, 'rb') as file:
+            for chunk in iter_line_chunks(file, chunk_size):
+                timestamps, sensor_ids, states = [], [], []
+                for prefix, fields in iter_big_lines(chunk):
+                    timestamps.append(parse_line_prefix(prefix)[0])
+                    sensor_ids.append(fields[2].decode().lower())
+                    states.append(fields[17])
+                if states:
+                    counter.add(parse_timestamps(timestamps), sensor_ids, states)
+        counter.merge()
+        return counter
+
+    def load_checkpoint(self, checkpoint_file: str) -> dict:
+        """Read a follow-mode checkpoint, or return an empty one if the file does not exist
+        or was written for another log file."""
+        empty = {'inode': None, 'offset': 0, 'valid_sensors': {}, 'sensor_errors': {}}
+        if not os.path.exists(checkpoint_file):
+            return empty
+        with open(checkpoint_file, 'r') as file:
+            checkpoint = json.load(file)
+        if checkpoint.get('log_file') != os.path.abspath(self.log_file):
+            return empty
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint_file: str, checkpoint: dict) -> None:
+        """Write a follow-mode checkpoint atomically."""
+        tmp_file = checkpoint_file + ".tmp"
+        with open(tmp_file, 'w') as file:
+            json.dump(checkpoint, file)
+        os.replace(tmp_file, checkpoint_file)
+
+    def read_appended(self, file: BinaryIO, offset: int, valid_sensors: Dict[str, int],
+                      sensor_errors: Dict[str, Dict[str, Optional[str]]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      partial_line: bool = False) -> int:
+        """Count BIG records from offset to the end of file and return the offset reached.
+
+        A trailing line without a newline is still being written, so it is left for the next
+        call unless partial_line is set.
+        """
+        file.seek(offset)
+        for chunk in iter_line_chunks(file, chunk_size):
+            if not partial_line and not chunk.endswith(b"\n"):
+                break
+            self.scan_big_records(chunk, valid_sensors, sensor_errors)
+            offset += len(chunk)
+        return offset
+
+    def process_sensor_logs_follow(self, checkpoint_file: str, rotated_log_file: Optional[str] = None,
+                                   chunk_size: int = DEFAULT_CHUNK_SIZE
+                                   ) -> Tuple[Dict[str, int], Dict[str, Dict[str, Optional[str]]]]:
+        """Same result as process_sensor_logs over all lines seen so far, reading only newly appended bytes.
+
+        The byte offset, inode and unfiltered counters are kept in checkpoint_file. When the log was
+        rotated, the rest of the old file is read from rotated_log_file (log_file + ".1" by default)
+        if it is still there; when it was truncated, reading starts again from the beginning.
+        """
+        checkpoint = self.load_checkpoint(checkpoint_file)
+        valid_sensors = checkpoint['valid_sensors']
+        sensor_errors = checkpoint['sensor_errors']
+        offset = checkpoint['offset']
+
+        with open(self.log_file, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            if checkpoint['inode'] is not None and checkpoint['inode'] != stat.st_ino:
+                rotated_log_file = rotated_log_file or self.log_file + ROTATED_LOG_SUFFIX
+                if os.path.exists(rotated_log_file) and os.stat(rotated_log_file).st_ino == checkpoint['inode']:
+                    with open(rotated_log_file, 'rb') as rotated:
+                        self.read_appended(rotated, offset, valid_sensors, sensor_errors, chunk_size,
+                                           partial_line=True)
+                offset = 0
+            elif offset > stat.st_size:
+                offset = 0
+            offset = self.read_appended(file, offset, valid_sensors, sensor_errors, chunk_size)
+
+        self.save_checkpoint(checkpoint_file, {
+            'log_file': os.path.abspath(self.log_file),
+            'inode': stat.st_ino,
+            'offset': offset,
+            'valid_sensors': valid_sensors,
+            'sensor_errors': sensor_errors,
+        })
+        valid_sensors = {k: v for k, v in valid_sensors.items() if k not in sensor_errors}
+        return valid_sensors, sensor_errors, sensor_errors
+
 
 if __name__ == "__main__":
     logs_processor = SensorAnalyzer(log_file='C:\\Users\\Anastasia\\KPI\\Python-data\\test_tasks\\app_2.log')
@@ -1,5 +1,7 @@
+import asyncio
+
 import pytest
-from scanner_handler import CheckQr
+from scanner_handler import AsyncCheckQr, CheckQr, MembershipCache, ScanPipeline
 
 
 @pytest.fixture
@@ -54,3 +56,163 @@ def test_scan_invalid_qr_error_handling(check_qr_instance, mocker):
 def test_scan_valid_qr_success_message(check_qr_instance, qr_length):
     qr = 'A' * qr_length
     assert check_qr_instance.can_add_device(qr) == qr
+
+
+def test_batch_scan_matches_single_scans(check_qr_instance, mocker):
+    mocker.patch.object(check_qr_instance, 'check_in_db', side_effect=lambda qr: qr != 'BBBBB')
+    qrs = ['AAA', 'AAAA', 'BBBBB', 'CCCCCCC']
+    send_error = mocker.patch.object(check_qr_instance, 'send_error')
+    for qr in qrs:
+        check_qr_instance.check_scanned_device(qr)
+    single_errors = [call[0][0] for call in send_error.call_args_list]
+    send_error.reset_mock()
+
+    results = check_qr_instance.check_scanned_devices(qrs)
+    assert [call[0][0] for call in send_error.call_args_list] == single_errors
+    assert [result.error for result in results] == [None, "Error: Wrong qr length 4", "Not in DB", None]
+    assert [result.color for result in results] == ['Red', None, 'Green', 'Fuzzy Wuzzy']
+    assert [result.message for result in results] == ["hallelujah AAA", None, None, "hallelujah CCCCCCC"]
+
+
+def test_batch_scan_queries_db_once(check_qr_instance, mocker):
+    check_in_db_many = mocker.patch.object(check_qr_instance, 'check_in_db_many', return_value={'AAA'})
+    check_qr_instance.check_scanned_devices(['AAA', 'AAAA', 'AAA', 'BBBBB'])
+    check_in_db_many.assert_called_once_with({'AAA', 'BBBBB'})
+
+
+class FakeDb:
+    def __init__(self, qrs, delay=0.001):
+        self.qrs = set(qrs)
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def check_in_db(self, qr):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        if qr == 'ERR':
+            raise ConnectionError
+        return qr in self.qrs
+
+
+@pytest.fixture
+def fake_db():
+    return FakeDb(['AAA', 'CCCCCCC'])
+
+
+@pytest.fixture
+def async_check_qr_instance(mocker, fake_db):
+    mocker.patch.object(AsyncCheckQr, 'check_in_db', side_effect=fake_db.check_in_db)
+    return AsyncCheckQr()
+
+
+def test_async_scan_results(async_check_qr_instance, mocker):
+    mocker.patch.object(async_check_qr_instance, 'send_error')
+    results = [asyncio.run(async_check_qr_instance.check_scanned_device(qr)) for qr in ['AAA', 'AAAA', 'BBBBB']]
+    assert [result.error for result in results] == [None, "Error: Wrong qr length 4", "Not in DB"]
+    assert results[0].message == "hallelujah AAA"
+    assert [call[0][0] for call in async_check_qr_instance.send_error.call_args_list] == [
+        "Error: Wrong qr length 4", "Not in DB"]
+
+
+def test_async_batch_scan(async_check_qr_instance, mocker):
+    mocker.patch.object(async_check_qr_instance, 'send_error')
+    results = asyncio.run(async_check_qr_instance.check_scanned_devices(['AAA', 'AAAA', 'BBBBB', 'CCCCCCC']))
+    assert [result.error for result in results] == [None, "Error: Wrong qr length 4", "Not in DB", None]
+    assert [result.message for result in results] == ["hallelujah AAA", None, None, "hallelujah CCCCCCC"]
+    with pytest.raises(TypeError):
+        async_check_qr_instance.scan_check_out_list('AAA')
+
+
+def test_async_batch_scan_caches_membership(mocker, fake_db):
+    check_qr = AsyncCheckQr(cache=MembershipCache())
+    mocker.patch.object(check_qr, 'check_in_db', side_effect=fake_db.check_in_db)
+    first = asyncio.run(check_qr.check_scanned_devices(['AAA', 'BBBBB']))
+    second = asyncio.run(check_qr.check_scanned_devices(['AAA', 'BBBBB']))
+    assert [result.error for result in first] == [result.error for result in second] == [None, "Not in DB"]
+    assert check_qr.check_in_db.call_count == 2
+
+
+def test_pipeline_limits_concurrency(async_check_qr_instance, fake_db):
+    qrs = ['AAA', 'BBBBB', 'CCCCCCC', 'AAAA', 'ERR'] * 10
+
+    async def run():
+        async with ScanPipeline(async_check_qr_instance, concurrency=3, max_pending=5) as pipeline:
+            await asyncio.gather(*(pipeline.submit(qr) for qr in qrs))
+        return pipeline.results
+
+    results = asyncio.run(run())
+    assert sorted(scan.qr for scan in results) == sorted(qrs)
+    assert fake_db.max_in_flight == 3
+    assert all(scan.latency >= 0 for scan in results)
+    assert all(isinstance(scan.exception, ConnectionError) for scan in results if scan.qr == 'ERR')
+    assert {scan.result.error for scan in results if scan.qr == 'BBBBB'} == {"Not in DB"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cached_check_qr_instance(mocker):
+    clock = FakeClock()
+    check_qr = CheckQr(cache=MembershipCache(maxsize=2, ttl=10, clock=clock))
+    mocker.patch.object(check_qr, 'check_in_db', side_effect=lambda qr: qr != 'BBBBB')
+    return check_qr, clock
+
+
+def test_cache_hits_positive_and_negative_lookups(cached_check_qr_instance, mocker):
+    check_qr, _ = cached_check_qr_instance
+    mocker.patch.object(check_qr, 'send_error')
+    for qr in ['AAA', 'BBBBB', 'AAA', 'BBBBB']:
+        check_qr.check_scanned_device(qr)
+    assert check_qr.check_in_db.call_count == 2
+    assert check_qr.send_error.call_args_list[-1][0][0] == "Not in DB"
+    assert check_qr.cache.stats() == {'hits': 2, 'misses': 2, 'evictions': 0, 'size': 2}
+
+
+def test_cache_ttl_lru_and_invalidation(cached_check_qr_instance):
+    check_qr, clock = cached_check_qr_instance
+    check_qr.is_in_db('AAA')
+    check_qr.is_in_db('BBBBB')
+    check_qr.is_in_db('AAA')
+    check_qr.is_in_db('CCCCCCC')
+    assert check_qr.cache.evictions == 1 and 'BBBBB' not in check_qr.cache.entries
+
+    clock.now = 11
+    check_qr.is_in_db('AAA')
+    assert check_qr.check_in_db.call_count == 4
+
+    check_qr.invalidate_cache('AAA')
+    check_qr.is_in_db('AAA')
+    assert check_qr.check_in_db.call_count == 5
+
+
+def test_batch_scan_queries_only_cache_misses(cached_check_qr_instance, mocker):
+    check_qr, _ = cached_check_qr_instance
+    check_qr.is_in_db('AAA')
+    check_in_db_many = mocker.patch.object(check_qr, 'check_in_db_many', return_value=set())
+    results = check_qr.check_scanned_devices(['AAA', 'BBBBB'])
+    check_in_db_many.assert_called_once_with({'BBBBB'})
+    assert [result.error for result in results] == [None, "Not in DB"]
+
+
+def test_cache_partition_and_set_many():
+    cache = MembershipCache(clock=FakeClock())
+    cache.set('AAA', True)
+    cache.set('BBBBB', False)
+    assert cache.partition(['AAA', 'BBBBB', 'CCCCCCC']) == ({'AAA'}, {'CCCCCCC'})
+    assert cache.set_many({'CCCCCCC', 'DDD'}, {'DDD'}) == {'DDD'}
+    assert cache.partition(['CCCCCCC', 'DDD']) == ({'DDD'}, set())
+
+
+def test_scan_invalid_qr_skips_db(check_qr_instance, mocker):
+    mocker.patch.object(check_qr_instance, 'send_error')
+    check_qr_instance.check_scanned_device('A' * 4)
+    check_qr_instance.check_in_db.assert_not_called()